@@ -0,0 +1,124 @@
+import numpy as np
+
+# Rows per chunk when expanding inputs against the background.
+# Keeps the (rows x background x width) intermediates to a few MB.
+ATTRIBUTION_CHUNK_ROWS = 256
+
+
+def check_supported(model):
+    """
+    Gradient attribution reads the weights directly, so it only supports
+    the ReLU / identity-output MLPRegressor that train_model.py builds.
+    """
+    if getattr(model, 'activation', None) != 'relu':
+        raise ValueError(f"Gradient attribution needs a ReLU MLP, got activation={getattr(model, 'activation', None)}")
+    if getattr(model, 'out_activation_', 'identity') != 'identity':
+        raise ValueError(f"Gradient attribution needs an identity output layer, got {model.out_activation_}")
+
+
+def forward_pre_activations(X, coefs, intercepts):
+    """
+    Runs the MLP forward and returns the pre-activation of every layer.
+    The last entry is the network output.
+    """
+    pre_activations = []
+    activation = X
+    last = len(coefs) - 1
+    for i, (W, b) in enumerate(zip(coefs, intercepts)):
+        z = activation @ W + b
+        pre_activations.append(z)
+        if i != last:
+            activation = np.maximum(z, 0)
+    return pre_activations
+
+
+def _normalize_weights(background, background_weights):
+    if background_weights is None:
+        return np.full(background.shape[0], 1.0 / background.shape[0])
+    weights = np.asarray(background_weights, dtype=np.float64)
+    return weights / weights.sum()
+
+
+def _deeplift_chunk(X, background, coefs, intercepts, weights, background_pre):
+    x_pre = forward_pre_activations(X, coefs, intercepts)
+
+    # Rescale rule multiplier for each hidden ReLU, per (row, reference) pair
+    multipliers = []
+    for z_x, z_r in zip(x_pre[:-1], background_pre[:-1]):
+        delta_z = z_x[:, None, :] - z_r[None, :, :]
+        delta_a = np.maximum(z_x, 0)[:, None, :] - np.maximum(z_r, 0)[None, :, :]
+        gradient = np.broadcast_to((z_x > 0)[:, None, :], delta_z.shape).astype(X.dtype)
+        safe = np.abs(delta_z) > 1e-12
+        m = np.where(safe, delta_a / np.where(safe, delta_z, 1.0), gradient)
+        multipliers.append(m)
+
+    # Backpropagate multipliers from the scalar output to the inputs
+    grad = np.ones((X.shape[0], background.shape[0], 1), dtype=X.dtype)
+    for layer in range(len(coefs) - 1, 0, -1):
+        grad = (grad @ coefs[layer].T) * multipliers[layer - 1]
+    grad = grad @ coefs[0].T
+
+    delta_x = X[:, None, :] - background[None, :, :]
+    return np.einsum('nbf,b->nf', delta_x * grad, weights)
+
+
+def deeplift_rescale(X, background, coefs, intercepts, background_weights=None):
+    """
+    DeepLIFT (Rescale rule) attributions for a ReLU MLP, averaged over the background.
+    Exactly additive: each row sums to f(x) minus the weighted mean background output.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    background = np.asarray(background, dtype=np.float64)
+    weights = _normalize_weights(background, background_weights)
+    background_pre = forward_pre_activations(background, coefs, intercepts)
+
+    out = np.empty_like(X)
+    for start in range(0, X.shape[0], ATTRIBUTION_CHUNK_ROWS):
+        stop = start + ATTRIBUTION_CHUNK_ROWS
+        out[start:stop] = _deeplift_chunk(X[start:stop], background, coefs, intercepts, weights, background_pre)
+    return out
+
+
+def _input_gradients(points, coefs, intercepts):
+    """
+    Gradient of the scalar MLP output with respect to its input, for each row.
+    """
+    pre = forward_pre_activations(points, coefs, intercepts)
+    grad = np.ones((points.shape[0], 1), dtype=points.dtype)
+    for layer in range(len(coefs) - 1, 0, -1):
+        grad = (grad @ coefs[layer].T) * (pre[layer - 1] > 0)
+    return grad @ coefs[0].T
+
+
+def integrated_gradients(X, background, coefs, intercepts, steps=32, background_weights=None):
+    """
+    Integrated Gradients with a midpoint Riemann sum, averaged over the background.
+    Approximately additive; the error shrinks as `steps` grows.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    background = np.asarray(background, dtype=np.float64)
+    weights = _normalize_weights(background, background_weights)
+    alphas = (np.arange(steps) + 0.5) / steps
+
+    n_background, n_features = background.shape
+    chunk_rows = max(1, ATTRIBUTION_CHUNK_ROWS // steps)
+
+    out = np.empty_like(X)
+    for start in range(0, X.shape[0], chunk_rows):
+        x = X[start:start + chunk_rows]
+        delta_x = x[:, None, :] - background[None, :, :]
+        points = background[None, :, None, :] + alphas[None, None, :, None] * delta_x[:, :, None, :]
+        grads = _input_gradients(points.reshape(-1, n_features), coefs, intercepts)
+        avg_grads = grads.reshape(x.shape[0], n_background, steps, n_features).mean(axis=2)
+        out[start:start + chunk_rows] = np.einsum('nbf,b->nf', delta_x * avg_grads, weights)
+    return out
+
+
+def expected_output(background, coefs, intercepts, background_weights=None):
+    """
+    Weighted mean model output over the background (the attribution base value).
+    """
+    background = np.asarray(background, dtype=np.float64)
+    weights = _normalize_weights(background, background_weights)
+    outputs = forward_pre_activations(background, coefs, intercepts)[-1].ravel()
+    return float(outputs @ weights)
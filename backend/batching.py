@@ -0,0 +1,137 @@
+import asyncio
+import time
+
+# Upper bounds of the batch-size histogram buckets
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+
+class MicroBatcher:
+    """
+    Groups concurrent requests into one batch call.
+
+    Requests wait in an asyncio queue. The dispatcher takes the first one, keeps
+    collecting until `max_batch_size` items or `max_wait_ms` have passed, then
+    runs `score_batch(items)` in a worker thread. `score_batch` must return one
+    result per item, in order; an Exception in a slot fails only that request.
+    """
+
+    def __init__(self, score_batch, max_batch_size=32, max_wait_ms=5.0, max_concurrent_batches=2, executor=None):
+        self.score_batch = score_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.max_concurrent_batches = max_concurrent_batches
+        self.executor = executor
+
+        self._queue = None
+        self._task = None
+        self._slots = None
+        self._inflight = set()
+
+        self.batches = 0
+        self.requests = 0
+        self.max_queue_depth = 0
+        self.largest_batch = 0
+        self.total_wait_ms = 0.0
+        self.histogram = {bucket: 0 for bucket in BATCH_SIZE_BUCKETS}
+        self.histogram_overflow = 0
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.max_concurrent_batches)
+        self._task = asyncio.create_task(self._dispatch())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+
+    async def submit(self, item):
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((item, future, time.perf_counter()))
+        self.max_queue_depth = max(self.max_queue_depth, self._queue.qsize())
+        return await future
+
+    async def _collect(self):
+        batch = [await self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait_ms / 1000.0
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _dispatch(self):
+        while True:
+            await self._slots.acquire()
+            try:
+                batch = await self._collect()
+            except BaseException:
+                self._slots.release()
+                raise
+            task = asyncio.create_task(self._run_batch(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _run_batch(self, batch):
+        try:
+            started = time.perf_counter()
+            self._record(batch, started)
+
+            items = [item for item, _, _ in batch]
+            loop = asyncio.get_running_loop()
+            try:
+                results = await loop.run_in_executor(self.executor, self.score_batch, items)
+            except Exception as e:
+                results = [e] * len(batch)
+
+            for (_, future, _), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+        finally:
+            self._slots.release()
+
+    def _record(self, batch, started):
+        size = len(batch)
+        self.batches += 1
+        self.requests += size
+        self.largest_batch = max(self.largest_batch, size)
+        self.total_wait_ms += sum((started - enqueued) * 1000.0 for _, _, enqueued in batch)
+
+        for bucket in BATCH_SIZE_BUCKETS:
+            if size <= bucket:
+                self.histogram[bucket] += 1
+                break
+        else:
+            self.histogram_overflow += 1
+
+    def stats(self):
+        histogram = {f"le_{bucket}": count for bucket, count in self.histogram.items()}
+        histogram["overflow"] = self.histogram_overflow
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue_depth": self.max_queue_depth,
+            "batches_in_flight": len(self._inflight),
+            "batches": self.batches,
+            "requests": self.requests,
+            "mean_batch_size": round(self.requests / self.batches, 2) if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "mean_queue_wait_ms": round(self.total_wait_ms / self.requests, 3) if self.requests else 0.0,
+            "batch_size_histogram": histogram
+        }
@@ -0,0 +1,127 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import joblib
+import numpy as np
+
+# Bumped whenever the cached layout changes, so old entries are ignored
+CACHE_FORMAT = 1
+
+DEFAULT_CACHE_DIR = '.dataset_cache'
+
+# Per-source stat memo, so an unchanged file is not re-hashed on every run
+_INDEX_FILE = 'index.json'
+
+
+class CachedDataset:
+    """
+    A preprocessed training matrix read back from the cache. X (float32) and y
+    are read-only memory maps; only the pages training touches are read from disk.
+    """
+
+    def __init__(self, path, hit):
+        self.path = path
+        self.hit = hit
+        with open(os.path.join(path, 'meta.json')) as f:
+            self.meta = json.load(f)
+
+        self.X = np.load(os.path.join(path, 'X.npy'), mmap_mode='r')
+        self.y = np.load(os.path.join(path, 'y.npy'), mmap_mode='r')
+        self.strata = np.load(os.path.join(path, 'strata.npy'))
+        self.feature_columns = self.meta['feature_columns']
+        self.processed_feature_names = self.meta['processed_feature_names']
+        self.preprocessor = joblib.load(os.path.join(path, 'preprocessor.pkl'))
+
+
+def file_digest(path, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    sha256 of the file contents. The result is remembered against the file's size and
+    mtime, so it is only recomputed when the file changes.
+    """
+    stat = os.stat(path)
+    source = os.path.abspath(path)
+    index_path = os.path.join(cache_dir, _INDEX_FILE)
+
+    index = {}
+    if os.path.exists(index_path):
+        with open(index_path) as f:
+            index = json.load(f)
+
+    known = index.get(source)
+    if known and known['size'] == stat.st_size and known['mtime_ns'] == stat.st_mtime_ns:
+        return known['digest']
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 22), b''):
+            digest.update(block)
+
+    index[source] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'digest': digest.hexdigest()}
+    os.makedirs(cache_dir, exist_ok=True)
+    staging = f'{index_path}.tmp-{os.getpid()}'
+    with open(staging, 'w') as f:
+        json.dump(index, f, indent=2)
+    os.replace(staging, index_path)
+    return index[source]['digest']
+
+
+def dataset_key(data_path, config, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Cache key: content hash of the source file plus the column configuration.
+    """
+    payload = json.dumps({'format': CACHE_FORMAT, 'source': file_digest(data_path, cache_dir), 'config': config},
+                         sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def load_or_build(data_path, build, config, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Returns a CachedDataset for `data_path`. On a miss, `build(data_path)` must return
+    (X_processed, y, strata, feature_columns, processed_feature_names, fitted_preprocessor);
+    the result is written to the cache first, so hits and misses return the same arrays.
+    """
+    key = dataset_key(data_path, config, cache_dir)
+    path = os.path.join(cache_dir, key)
+    if os.path.exists(os.path.join(path, 'meta.json')):
+        print(f"Dataset cache hit: {path}")
+        return CachedDataset(path, hit=True)
+
+    print(f"Dataset cache miss, building {path}...")
+    started = time.perf_counter()
+    X, y, strata, feature_columns, processed_feature_names, preprocessor = build(data_path)
+
+    # Written next to the entry and renamed in, so a concurrent reader never sees half of it
+    staging = f'{path}.tmp-{os.getpid()}'
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    np.save(os.path.join(staging, 'X.npy'), np.ascontiguousarray(X, dtype=np.float32))
+    np.save(os.path.join(staging, 'y.npy'), np.asarray(y, dtype=np.float64))
+    np.save(os.path.join(staging, 'strata.npy'), np.asarray(strata).astype(str))
+    joblib.dump(preprocessor, os.path.join(staging, 'preprocessor.pkl'))
+    with open(os.path.join(staging, 'meta.json'), 'w') as f:
+        json.dump({
+            'format': CACHE_FORMAT,
+            'key': key,
+            'source': os.path.abspath(data_path),
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'rows': int(len(y)),
+            'config': config,
+            'feature_columns': list(feature_columns),
+            'processed_feature_names': [str(name) for name in processed_feature_names],
+            'build_seconds': round(time.perf_counter() - started, 3)
+        }, f, indent=2, default=str)
+
+    try:
+        os.rename(staging, path)
+    except OSError:
+        # Another process finished the same entry first; its copy is identical
+        shutil.rmtree(staging, ignore_errors=True)
+
+    return CachedDataset(path, hit=False)
+
+
+def clear(cache_dir=DEFAULT_CACHE_DIR):
+    shutil.rmtree(cache_dir, ignore_errors=True)
@@ -1,103 +1,377 @@
-import pandas as pd
 import numpy as np
-import joblib
-import shap
 import os
+import hashlib
+import math
+import threading
+import time
+import attribution
+from fast_inference import CompiledPipeline
+from model_bundle import load_bundle, is_bundle, DEFAULT_BUNDLE_DIR
+from metrics import MetricsRegistry
+
+# pandas, joblib and shap are imported where they are used: a bundle-backed service that
+# only predicts or runs gradient attributions never loads them, which keeps startup fast
+
+# KernelExplainer cost grows linearly with rows, so SHAP on batches is capped
+MAX_SHAP_BATCH_ROWS = 50
+# With a SHAP process pool the cap rises, and batches from this size up go to the pool
+MAX_PARALLEL_SHAP_ROWS = 1000
+PARALLEL_SHAP_MIN_ROWS = 8
+
+# 'kernel' is model-agnostic SHAP. The gradient modes read the MLP weights directly.
+ATTRIBUTION_MODES = ('kernel', 'deeplift', 'integrated_gradients')
+GRADIENT_MODES = ('deeplift', 'integrated_gradients')
+
+# What-if grids are scored in one forward pass; this bounds the matrix size
+MAX_SWEEP_POINTS = 100_000
+MAX_SWEEP_AXES = 2
+
+# DeepLIFT rows should sum to prediction minus base value within this tolerance (tons).
+# A larger gap is numerical drift, not a failed request: it is counted and logged once.
+ADDITIVITY_TOLERANCE = 1e-6
+
+# Explanation tiers, most to least expensive. 'reduced' is KernelExplainer with a fixed,
+# small coalition sample, 'fast' is DeepLIFT and 'none' returns the prediction only.
+EXPLANATION_TIERS = ('full', 'reduced', 'fast', 'none')
+REDUCED_KERNEL_NSAMPLES = 128
+
+# Per-row attribution cost (seconds) assumed until warm_up or live requests measure it
+DEFAULT_ATTRIBUTION_COSTS = {'kernel': 0.5, 'kernel_reduced': 0.05, 'deeplift': 0.001, 'integrated_gradients': 0.01}
+COST_SMOOTHING = 0.2
+
+# A failed warm-up is retried (see retry_warm_up) at most this often
+WARM_UP_RETRY_SECONDS = 30.0
+
+def service_paths(artifact_dir, bundle_path=None):
+    """
+    ExplainerService path arguments for the artifacts train_model.py writes to
+    `artifact_dir`. The bundle defaults to <artifact_dir>/model_bundle.
+    """
+    return {
+        'model_path': os.path.join(artifact_dir, 'maritime_model.pkl'),
+        'preprocessor_path': os.path.join(artifact_dir, 'preprocessor.pkl'),
+        'features_col_path': os.path.join(artifact_dir, 'feature_names.pkl'),
+        'background_path': os.path.join(artifact_dir, 'shap_background.pkl'),
+        'ensemble_path': os.path.join(artifact_dir, 'maritime_ensemble.pkl'),
+        'bundle_path': bundle_path or os.path.join(artifact_dir, DEFAULT_BUNDLE_DIR)
+    }
 
 class ExplainerService:
-    def __init__(self, model_path='maritime_model.pkl', preprocessor_path='preprocessor.pkl', features_col_path='feature_names.pkl'):
+    def __init__(self, model_path='maritime_model.pkl', preprocessor_path='preprocessor.pkl', features_col_path='feature_names.pkl',
+                 background_path='shap_background.pkl', warm=True, cache=None, fast_path=True, metrics=None,
+                 ensemble_path='maritime_ensemble.pkl', bundle_path=None, warm_kernel=True, shap_workers=0,
+                 warm_shap_pool=True):
         print("Initializing ExplainerService...")
         self.model_path = model_path
         self.preprocessor_path = preprocessor_path
-        
-        if os.path.exists(model_path) and os.path.exists(preprocessor_path):
-            self.model = joblib.load(model_path)
-            self.preprocessor = joblib.load(preprocessor_path)
-            self.feature_names = joblib.load(features_col_path)
-            
-            self.explainer = None 
-            
+        self.features_col_path = features_col_path
+        self.background_path = background_path
+        # Optional seed ensemble from model_search.py; predictions average its members
+        self.ensemble_path = ensemble_path
+        # A model_bundle directory takes precedence over the pickles; it always serves compiled
+        self.bundle_path = bundle_path
+        self.warm = warm
+        # False leaves shap unimported and KernelExplainer unbuilt until a kernel explanation is requested
+        self.warm_kernel = warm_kernel
+        # Optional PredictionCache in front of explain / explain_batch
+        self.cache = cache
+        # Serve through CompiledPipeline instead of pandas + sklearn when it passes parity
+        self.fast_path = fast_path
+        # Stage timings; a disabled registry costs one attribute lookup per stage
+        self.metrics = metrics if metrics is not None else MetricsRegistry(enabled=False)
+        # Measured per-row attribution cost by method, used to pick a tier for a latency budget
+        self.attribution_costs = dict(DEFAULT_ATTRIBUTION_COSTS)
+        # Processes for KernelExplainer on large batches (parallel_shap.py); 0 keeps SHAP in-process
+        self.shap_workers = shap_workers
+        # False leaves the pool unstarted until the first large kernel batch (pre-fork parents)
+        self.warm_shap_pool = warm_shap_pool
+        self.shap_pool = None
+        self._shap_pool_lock = threading.Lock()
+        # Set by close(); a retired service never starts another pool
+        self._closed = False
+        # KernelExplainer keeps per-call state on the instance (and draws from the global
+        # np.random), so concurrent batches and threadpool requests take turns on it
+        self._kernel_lock = threading.Lock()
+        self._warm_up_lock = threading.Lock()
+        self._last_warm_up = float('-inf')
+        self._additivity_warned = False
+
+        self._load_artifacts()
+
+    def _load_artifacts(self):
+        # Pool workers hold the previous model
+        self._stop_shap_pool()
+        started = time.perf_counter()
+        self.ready = False
+        self.model_version = None
+        self.load_seconds = None
+
+        self.bundle = None
+        self.model = None
+        self.members = []
+        self.preprocessor = None
+        self.pipeline = None
+        self.explainer = None
+        self.background_summary = None
+        self.background_weights = None
+
+        if is_bundle(self.bundle_path):
+            self._load_bundle()
+        elif os.path.exists(self.model_path) and os.path.exists(self.preprocessor_path):
+            self._load_pickles()
         else:
             print("Model artifacts not found. Visualization/Prediction will fail until trained.")
-            self.model = None
+            return
+
+        if self.warm:
+            self.warm_up()
+
+        self.load_seconds = time.perf_counter() - started
+
+    def _load_bundle(self):
+        self.bundle = load_bundle(self.bundle_path)
+        self.feature_names = self.bundle.input_columns
+        self.model_version = self.bundle.version
+        self.pipeline = self.bundle.pipeline()
+        print(f"Loaded model bundle {self.model_version} from {self.bundle_path} ({len(self.bundle.members)} member(s))")
+
+        if self.bundle.background is not None:
+            self.background_summary = self.bundle.background
+            self.background_weights = self.bundle.background_weights
+        else:
+            print("Bundle has no SHAP background. Falling back to synthetic background.")
+
+    def _load_pickles(self):
+        import joblib
+
+        self.model = joblib.load(self.model_path)
+        self.preprocessor = joblib.load(self.preprocessor_path)
+        self.feature_names = joblib.load(self.features_col_path)
+
+        self.members = [self.model]
+        if self.ensemble_path and os.path.exists(self.ensemble_path):
+            self.members = list(joblib.load(self.ensemble_path))
+            print(f"Loaded seed ensemble: {len(self.members)} members")
+        self.model_version = self._artifact_version()
+
+        if self.fast_path:
+            self._compile_pipeline()
+
+        if os.path.exists(self.background_path):
+            background = joblib.load(self.background_path)
+            self.background_summary = np.asarray(background['data'])
+            self.background_weights = background.get('weights')
+            print(f"Loaded SHAP background ({background.get('method', 'unknown')}): {self.background_summary.shape}")
+        else:
+            print("SHAP background not found. Falling back to synthetic background; retrain to persist one.")
+
+    @property
+    def is_loaded(self):
+        return self.bundle is not None or self.model is not None
+
+    def _compile_pipeline(self):
+        try:
+            pipeline = CompiledPipeline.from_sklearn(self.preprocessor, self.members)
+            gap = pipeline.check_parity(self.preprocessor, self.members)
+            self.pipeline = pipeline
+            print(f"Compiled inference path enabled (max parity gap {gap:.2e} tons)")
+        except Exception as e:
+            print(f"Compiled inference path disabled, using sklearn: {e}")
+
+    def _transform(self, inputs):
+        if self.pipeline is not None:
+            with self.metrics.stage('preprocess'):
+                return self.pipeline.transform_records(inputs)
+
+        import pandas as pd
+
+        with self.metrics.stage('frame'):
+            input_df = pd.DataFrame(list(inputs))
+        with self.metrics.stage('preprocess'):
+            return self.preprocessor.transform(input_df)
+
+    def _predict_processed(self, processed_input):
+        if self.pipeline is not None:
+            return self.pipeline.predict_matrix(processed_input)
+        if len(self.members) > 1:
+            return np.mean([member.predict(processed_input) for member in self.members], axis=0)
+        return self.model.predict(processed_input)
+
+    def _artifact_version(self):
+        """
+        Short content hash of the model artifacts, used to key cached results.
+        """
+        digest = hashlib.sha256()
+        for path in (self.model_path, self.preprocessor_path, self.background_path, self.ensemble_path):
+            if not path:
+                continue
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    for block in iter(lambda: f.read(1 << 20), b''):
+                        digest.update(block)
+        return digest.hexdigest()[:12]
+
+    def close(self):
+        """
+        Stops the SHAP process pool for good, e.g. when a reload retires this service.
+        Calls still in flight finish; later ones explain in-process.
+        """
+        with self._shap_pool_lock:
+            self._closed = True
+            self.shap_workers = 0
+        self._stop_shap_pool()
+
+    def _stop_shap_pool(self):
+        with self._shap_pool_lock:
+            pool, self.shap_pool = self.shap_pool, None
+        if pool is not None:
+            pool.close()
+
+    @property
+    def max_kernel_rows(self):
+        return MAX_PARALLEL_SHAP_ROWS if self.shap_workers else MAX_SHAP_BATCH_ROWS
+
+    def _parallel_shap(self):
+        """
+        The process pool, started on first use. None once close() has run, so a request
+        racing a reload explains in-process instead of starting a pool nothing would stop.
+        """
+        with self._shap_pool_lock:
+            if self._closed:
+                return None
+            if self.shap_pool is not None and not self.shap_pool.owned:
+                # Inherited across fork: the executor belongs to the parent, so start our own
+                self.shap_pool = None
+            if self.shap_pool is None:
+                from parallel_shap import ParallelKernelExplainer
+                predictor = self.pipeline if self.pipeline is not None else self.members
+                self.shap_pool = ParallelKernelExplainer(predictor, self._ensure_background(), self.background_weights,
+                                                         workers=self.shap_workers)
+            return self.shap_pool
+
+    def warm_up(self):
+        """
+        Builds the background and KernelExplainer and runs one explanation per tier,
+        so the first real request does not pay for it and tier costs start out measured.
+        With warm_kernel off only the prediction and gradient tiers are warmed.
+        """
+        self._last_warm_up = time.monotonic()
+        try:
+            background = self._ensure_background()
+            predictions = self._predict_processed(background[:1])
+            if self.warm_kernel:
+                with self._kernel_lock:
+                    self._ensure_explainer()
+            for tier in EXPLANATION_TIERS:
+                mode, nsamples = self._tier_plan(tier, 'kernel')
+                if mode is not None and (mode != 'kernel' or self.warm_kernel):
+                    self._attribution_matrix(background[:1], predictions, mode, nsamples)
+            if self.shap_workers and self.warm_kernel and self.warm_shap_pool:
+                self._parallel_shap().warm_up(background)
+            self.ready = True
+        except Exception as e:
+            print(f"Explainer warm-up failed; retrying within {WARM_UP_RETRY_SECONDS:.0f}s or on the first explanation: {e}")
+        return self.ready
+
+    def retry_warm_up(self):
+        """
+        Runs warm_up again while the service is loaded but not ready, at most once per
+        WARM_UP_RETRY_SECONDS and never twice at once. Returns immediately otherwise.
+        """
+        if self.ready or not self.is_loaded or not self._warm_up_lock.acquire(blocking=False):
+            return self.ready
+        try:
+            if time.monotonic() - self._last_warm_up >= WARM_UP_RETRY_SECONDS:
+                self.warm_up()
+        finally:
+            self._warm_up_lock.release()
+        return self.ready
 
     def _get_feature_names_after_encoding(self):
         """
         Reconstructs feature names after OneHotEncoding to map SHAP values back to meaningful names.
+        Column lists are read from the fitted preprocessor so they always match the trained artifacts.
         """
-        transformers = self.preprocessor.named_transformers_
-        cat_transformer = transformers['cat']
-        
-        encoded_cats = cat_transformer.get_feature_names_out([
-            'Ship_Type', 'Hull_Fouling', 'Main_Engine_Type', 'Propeller_Type', 
-            'Speed_Profile', 'Season', 'Wind_Direction', 'Current_Direction', 'Fuel_Type'
-        ])
-        
-        numerics = [
-            'DWT', 'GT', 'LOA', 'Beam', 'Design_Speed', 'Draft_Percentage', 
-            'Engine_Power_kW', 'SFOC_g_kWh', 'Distance_NM', 'Avg_Speed_Knots', 
-            'Wind_Beaufort', 'Wave_Height_m', 'Current_Speed_Knots', 'Weather_Routing_Efficiency'
-        ]
-        
-        return list(numerics) + list(encoded_cats)
+        if self.preprocessor is None:
+            # Bundle: same naming as OneHotEncoder.get_feature_names_out
+            names = list(self.pipeline.numerical_cols)
+            for col, values in zip(self.pipeline.categorical_cols, self.pipeline.categories):
+                names.extend(f'{col}_{value}' for value in values)
+            return names
+
+        names = []
+        for name, transformer, columns in self.preprocessor.transformers_:
+            if name == 'num':
+                names.extend(columns)
+            elif name == 'cat':
+                names.extend(transformer.get_feature_names_out(columns))
+
+        return names
+
+    def _ensure_background(self):
+        if self.background_summary is not None:
+            return self.background_summary
+
+        # Generate a small background dataset for SHAP to use as reference
+        # This is much more stable than a single zero vector
+        from data_generator import generate_synthetic_data
+
+        background_df = generate_synthetic_data(num_samples=50)
+        # We must drop the target if it's in there, but generator returns it.
+        # The preprocessor expects the columns.
+        if 'Fuel_Consumption_Tons' in background_df.columns:
+            background_df = background_df.drop('Fuel_Consumption_Tons', axis=1)
+
+        if self.preprocessor is None:
+            self.background_data = self.pipeline.transform_columns(background_df)
+        else:
+            self.background_data = self.preprocessor.transform(background_df)
+
+        # Use simple sampling instead of kmeans to avoid indexing bugs
+        # Just take first 20 samples. Synthetic data is random anyway.
+        self.background_summary = self.background_data[:20]
+        print(f"Generated synthetic SHAP background: {self.background_summary.shape}")
+        return self.background_summary
+
+    def _ensure_explainer(self):
+        if self.explainer is not None:
+            return self.explainer
+
+        background = self._ensure_background()
+        if self.background_weights is not None:
+            # Same weighted summary shap.kmeans produces
+            from shap.utils._legacy import DenseData
+            group_names = [str(i) for i in range(background.shape[1])]
+            background = DenseData(background, group_names, None, np.asarray(self.background_weights, dtype=float))
+
+        import shap
+        self.explainer = shap.KernelExplainer(self._predict_processed, background)
+        return self.explainer
+
+    def _shap_matrix(self, processed_input, nsamples='auto'):
+        """
+        Runs SHAP on a processed matrix and returns one row of values per input row.
+        `nsamples` is KernelExplainer's coalition budget per row. Rows are seeded the way
+        the process pool seeds them, so results do not depend on shap_workers.
+        """
+        from parallel_shap import explain_rows, DEFAULT_SEED
+
+        explainer = self._ensure_explainer()
 
-    def explain(self, input_data: dict):
-        if not self.model:
-            raise ValueError("Model not loaded")
-            
-        # 1. Prepare DataFrame
-        input_df = pd.DataFrame([input_data])
-        
-        # 2. Preprocess
-        processed_input = self.preprocessor.transform(input_df)
-        
-        # 3. Predict
-        prediction = self.model.predict(processed_input)
-        fuel_estimate = float(prediction[0])
-        
-        # 4. SHAP Explanation
-        # 4. SHAP Explanation
-        if self.explainer is None:
-             # Generate a small background dataset for SHAP to use as reference
-             # This is much more stable than a single zero vector
-             from backend.data_generator import generate_synthetic_data
-             
-             print("Generating SHAP background data...")
-             background_df = generate_synthetic_data(num_samples=50)
-             # We must drop the target if it's in there, but generator returns it.
-             # The preprocessor expects the columns.
-             if 'Fuel_Consumption_Tons' in background_df.columns:
-                 background_df = background_df.drop('Fuel_Consumption_Tons', axis=1)
-                 
-             self.background_data = self.preprocessor.transform(background_df)
-             
-             print(f"DEBUG: Background Data Shape: {self.background_data.shape}")
-             
-             # Use simple sampling instead of kmeans to avoid indexing bugs
-             # Just take first 20 samples. Synthetic data is random anyway.
-             self.background_summary = self.background_data[:20]
-             print(f"DEBUG: Background Summary Shape: {self.background_summary.shape}")
-             
-             self.explainer = shap.KernelExplainer(self.model.predict, self.background_summary)
-        
         try:
-            # Run SHAP
-            shap_values = self.explainer.shap_values(processed_input)
-            
-            # Debug Shapes
-            sh_shape = "N/A"
-            if isinstance(shap_values, list):
-                sh_shape = f"List[{len(shap_values)}] x {shap_values[0].shape}"
-                vals = shap_values[0][0]
-            else:
-                sh_shape = str(shap_values.shape)
-                vals = shap_values[0]
+            # Run SHAP without disturbing anyone else's use of the global np.random
+            state = np.random.get_state()
+            try:
+                vals = explain_rows(explainer, np.asarray(processed_input, dtype=np.float64), nsamples, DEFAULT_SEED)
+            finally:
+                np.random.set_state(state)
+            sh_shape = str(vals.shape)
 
             feature_names = self._get_feature_names_after_encoding()
-            
+
             # Sanity Check
-            if len(vals) != len(feature_names):
-                raise ValueError(f"Shape Mismatch: SHAP vals {len(vals)} vs Names {len(feature_names)}")
+            if vals.shape[1] != len(feature_names):
+                raise ValueError(f"Shape Mismatch: SHAP vals {vals.shape[1]} vs Names {len(feature_names)}")
 
         except Exception as e:
             import traceback
@@ -105,22 +379,488 @@ class ExplainerService:
             debug_info = f"Error: {str(e)} | SHAP Shape: {sh_shape if 'sh_shape' in locals() else 'Unknown'} | Input Shape: {processed_input.shape}"
             print(debug_info)
             print(tb)
-            raise ValueError(debug_info)   
+            raise ValueError(debug_info)
+
+        return vals
+
+    def _gradient_matrix(self, processed_input, predictions, mode):
+        """
+        Attributions computed from the MLP weights against the same background as SHAP.
+        Returns the attribution matrix and the base value it is relative to.
+        For an ensemble both are averaged over members, which keeps DeepLIFT additive.
+        """
+        background = self._ensure_background()
+        processed_input = np.asarray(processed_input, dtype=np.float64)
+
+        weights = self.background_weights
+
+        vals = 0.0
+        base_value = 0.0
+        member_weights = self._member_weights()
+        for coefs, intercepts in member_weights:
+            if mode == 'deeplift':
+                vals = vals + attribution.deeplift_rescale(processed_input, background, coefs, intercepts, background_weights=weights)
+            else:
+                vals = vals + attribution.integrated_gradients(processed_input, background, coefs, intercepts, background_weights=weights)
+            base_value += attribution.expected_output(background, coefs, intercepts, background_weights=weights)
+        vals = vals / len(member_weights)
+        base_value /= len(member_weights)
+
+        # Sanity Check: DeepLIFT Rescale is exactly additive for ReLU networks
+        if mode == 'deeplift' and len(vals):
+            gap = np.abs(vals.sum(axis=1) + base_value - np.asarray(predictions, dtype=np.float64))
+            mismatched = int(np.count_nonzero(gap > ADDITIVITY_TOLERANCE))
+            if mismatched:
+                self.metrics.count("vesselfuel_attribution_additivity_mismatches_total",
+                                   "DeepLIFT rows whose attributions missed the prediction by more than the tolerance.",
+                                   mismatched)
+                if not self._additivity_warned:
+                    self._additivity_warned = True
+                    print(f"Warning: DeepLIFT attributions off by up to {gap.max():.2e} tons; "
+                          f"further mismatches are only counted in /metrics")
+
+        return vals, base_value
+
+    def _member_weights(self):
+        """
+        (coefs, intercepts) per ensemble member. Bundles only hold ReLU MLPs.
+        """
+        if self.bundle is not None:
+            return self.bundle.members
+        for member in self.members:
+            attribution.check_supported(member)
+        return [(member.coefs_, member.intercepts_) for member in self.members]
+
+    def _attribution_matrix(self, processed_input, predictions, mode, nsamples='auto'):
+        if mode not in ATTRIBUTION_MODES:
+            raise ValueError(f"Unknown attribution mode '{mode}', expected one of {ATTRIBUTION_MODES}")
+
+        method = 'kernel_reduced' if mode == 'kernel' and nsamples != 'auto' else mode
+        started = time.perf_counter()
+        with self.metrics.stage(f'attribution_{method}'):
+            result = None
+            if mode in GRADIENT_MODES:
+                result = self._gradient_matrix(processed_input, predictions, mode)
+            elif self.shap_workers and len(processed_input) >= PARALLEL_SHAP_MIN_ROWS:
+                pool = self._parallel_shap()
+                if pool is not None:
+                    try:
+                        result = pool.shap_values(processed_input, nsamples)
+                    except RuntimeError:
+                        # close() shut the executor down after we took it; finish in-process
+                        if not self._closed:
+                            raise
+            if result is None:
+                with self._kernel_lock:
+                    if len(processed_input) == 0:
+                        # KernelExplainer rejects an empty matrix; the gradient paths handle it themselves
+                        vals = np.zeros((0, processed_input.shape[1]))
+                    else:
+                        vals = self._shap_matrix(processed_input, nsamples)
+                    result = vals, float(np.ravel(self._ensure_explainer().expected_value)[0])
+
+        per_row = (time.perf_counter() - started) / max(len(processed_input), 1)
+        known = self.attribution_costs.get(method, per_row)
+        self.attribution_costs[method] = known + COST_SMOOTHING * (per_row - known)
+        return result
+
+    def _tier_plan(self, tier, mode):
+        """
+        (attribution mode, kernel nsamples) a tier runs, or (None, None) for 'none'.
+        A gradient `mode` is already cheaper than a reduced kernel, so it serves both upper tiers.
+        """
+        if tier not in EXPLANATION_TIERS:
+            raise ValueError(f"Unknown explanation tier '{tier}', expected one of {EXPLANATION_TIERS}")
+        if tier == 'none':
+            return None, None
+        if tier == 'fast':
+            return 'deeplift', None
+        if mode in GRADIENT_MODES:
+            return mode, None
+        if tier == 'reduced':
+            return 'kernel', REDUCED_KERNEL_NSAMPLES
+        return mode, 'auto'
+
+    def tier_cost_ms(self, tier, mode='kernel'):
+        """
+        Expected attribution time per row for a tier, from the measured costs.
+        """
+        mode, nsamples = self._tier_plan(tier, mode)
+        if mode is None:
+            return 0.0
+        method = 'kernel_reduced' if mode == 'kernel' and nsamples != 'auto' else mode
+        return self.attribution_costs[method] * 1000.0
+
+    def choose_tier(self, requested='full', budget_ms=None, degrade=0, mode='kernel'):
+        """
+        The most detailed tier at or below `requested` whose expected cost fits
+        `budget_ms`, then stepped down `degrade` further tiers (load shedding).
+        """
+        index = EXPLANATION_TIERS.index(requested) if requested in EXPLANATION_TIERS else None
+        if index is None:
+            raise ValueError(f"Unknown explanation tier '{requested}', expected one of {EXPLANATION_TIERS}")
+
+        if budget_ms is not None:
+            while index < len(EXPLANATION_TIERS) - 1 and self.tier_cost_ms(EXPLANATION_TIERS[index], mode) > budget_ms:
+                index += 1
+
+        return EXPLANATION_TIERS[min(index + max(degrade, 0), len(EXPLANATION_TIERS) - 1)]
+
+    def _build_result(self, fuel_estimate, vals, input_data):
+        feature_names = self._get_feature_names_after_encoding()
 
         contributions = {}
         for name, val in zip(feature_names, vals):
             contributions[name] = float(val)
-            
+
         aggregated_contributions = self._aggregate_contributions(contributions)
-        
-        text_explanation = self._generate_text(aggregated_contributions, fuel_estimate, input_data)
-        
+
+        with self.metrics.stage('text'):
+            text_explanation = self._generate_text(aggregated_contributions, fuel_estimate, input_data)
+
         return {
             "predicted_fuel_tons": round(fuel_estimate, 2),
             "contributions": aggregated_contributions,
             "text_explanation": text_explanation
         }
 
+    def explain(self, input_data: dict, mode='kernel', tier='full'):
+        if not self.is_loaded:
+            raise ValueError("Model not loaded")
+
+        plan_mode, nsamples = self._tier_plan(tier, mode)
+
+        cache_key = None
+        if self.cache is not None:
+            with self.metrics.stage('cache_lookup'):
+                cache_key = self.cache.make_key(input_data, self.model_version, mode, tier)
+                cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        # 1. Preprocess
+        processed_input = self._transform([input_data])
+
+        # 2. Predict
+        with self.metrics.stage('predict'):
+            prediction = self._predict_processed(processed_input)
+        fuel_estimate = float(prediction[0])
+
+        # 3. SHAP Explanation
+        if plan_mode is None:
+            result = {"predicted_fuel_tons": round(fuel_estimate, 2)}
+        else:
+            vals, base_value = self._attribution_matrix(processed_input, prediction, plan_mode, nsamples)
+            result = self._build_result(fuel_estimate, vals[0], input_data)
+            result["attribution_mode"] = plan_mode
+            result["base_value"] = round(base_value, 4)
+            # The lazy path works, so a failed or skipped warm-up no longer holds readiness back
+            self.ready = True
+        result["explanation_tier"] = tier
+
+        if cache_key is not None:
+            self.cache.put(cache_key, result)
+        return result
+
+    def prepare(self, inputs):
+        """
+        Preprocesses `inputs` and runs the forward pass. Returns (processed matrix,
+        predictions); pass them to explain_batch as `prepared` to explain the same rows
+        later without repeating either step.
+        """
+        if not self.is_loaded:
+            raise ValueError("Model not loaded")
+
+        processed_input = self._transform(inputs)
+        with self.metrics.stage('predict'):
+            predictions = np.asarray(self._predict_processed(processed_input))
+        return processed_input, predictions
+
+    def explain_batch(self, inputs, explain=False, max_explain_rows=None, mode='kernel', tier='full', prepared=None):
+        """
+        Scores a list of voyages with one preprocess and one forward pass.
+        Results come back in input order. Attributions only run when `explain` is set,
+        at the given explanation tier; the row cap (max_kernel_rows by default) applies
+        to KernelExplainer only. `prepared` is prepare(inputs) from an earlier call.
+        """
+        if not self.is_loaded:
+            raise ValueError("Model not loaded")
+
+        if not inputs:
+            return []
+
+        max_explain_rows = max_explain_rows or self.max_kernel_rows
+
+        if explain and self._tier_plan(tier, mode)[0] == 'kernel' and len(inputs) > max_explain_rows:
+            raise ValueError(f"SHAP is limited to {max_explain_rows} rows per batch, got {len(inputs)}")
+
+        if self.cache is None:
+            return self._score_rows(inputs, explain, mode, tier, prepared)
+
+        # Serve hits from the cache and score only the misses, in one pass
+        with self.metrics.stage('cache_lookup'):
+            keys = [self.cache.make_key(row, self.model_version, mode, tier if explain else False) for row in inputs]
+            results = [self.cache.get(key) for key in keys]
+        missing = [i for i, result in enumerate(results) if result is None]
+
+        if missing:
+            if prepared is not None:
+                prepared = prepared[0][missing], prepared[1][missing]
+            scored = self._score_rows([inputs[i] for i in missing], explain, mode, tier, prepared)
+            for i, result in zip(missing, scored):
+                self.cache.put(keys[i], result)
+                results[i] = result
+
+        return results
+
+    def _score_rows(self, inputs, explain, mode, tier='full', prepared=None):
+        processed_input, predictions = prepared if prepared is not None else self.prepare(inputs)
+
+        if not explain:
+            return [{"predicted_fuel_tons": round(float(p), 2)} for p in predictions]
+
+        plan_mode, nsamples = self._tier_plan(tier, mode)
+        if plan_mode is None:
+            return [{"predicted_fuel_tons": round(float(p), 2), "explanation_tier": tier} for p in predictions]
+
+        attribution_matrix, base_value = self._attribution_matrix(processed_input, predictions, plan_mode, nsamples)
+
+        results = []
+        for p, vals, input_data in zip(predictions, attribution_matrix, inputs):
+            result = self._build_result(float(p), vals, input_data)
+            result["attribution_mode"] = plan_mode
+            result["base_value"] = round(base_value, 4)
+            result["explanation_tier"] = tier
+            results.append(result)
+        self.ready = True
+        return results
+
+    def score_frame(self, frame, explain=False, mode='deeplift'):
+        """
+        Column-oriented scoring for offline jobs: one vectorized preprocess of a
+        DataFrame and one forward pass. Returns a DataFrame aligned with `frame`
+        holding predicted_fuel_tons and, when `explain` is set, one contrib_<feature>
+        column per encoded feature plus base_value. Only gradient attributions are
+        offered here; KernelExplainer does not scale to offline row counts.
+        """
+        if not self.is_loaded:
+            raise ValueError("Model not loaded")
+
+        if explain and mode not in GRADIENT_MODES:
+            raise ValueError(f"Offline attributions must use one of {GRADIENT_MODES}, got '{mode}'")
+
+        import pandas as pd
+
+        with self.metrics.stage('preprocess'):
+            if self.pipeline is not None:
+                processed_input = self.pipeline.transform_columns(frame)
+            else:
+                processed_input = self.preprocessor.transform(frame)
+        with self.metrics.stage('predict'):
+            predictions = np.asarray(self._predict_processed(processed_input), dtype=np.float64)
+
+        scored = pd.DataFrame({'predicted_fuel_tons': predictions}, index=frame.index)
+        if not explain:
+            return scored
+
+        vals, base_value = self._attribution_matrix(processed_input, predictions, mode)
+        contributions = pd.DataFrame(np.asarray(vals), columns=self.score_frame_columns(explain)[1:-1], index=frame.index)
+        contributions['base_value'] = base_value
+        return pd.concat([scored, contributions], axis=1)
+
+    def score_frame_columns(self, explain=False):
+        """
+        Column names score_frame returns, in order.
+        """
+        if not explain:
+            return ['predicted_fuel_tons']
+        names = self._aggregate_contributions({name: None for name in self._get_feature_names_after_encoding()})
+        return ['predicted_fuel_tons'] + [f'contrib_{name}' for name in names] + ['base_value']
+
+    def explain_legs(self, shared_input: dict, legs, explain=True, mode='deeplift'):
+        """
+        Scores a multi-leg voyage. `shared_input` holds the vessel, propulsion and fuel
+        fields; each leg dict holds its own distance, speed and environment. All legs go
+        through one preprocess and one forward pass. Attributions are computed for every
+        leg in one call and summed, so they add up to the total fuel minus
+        len(legs) * base value (exactly, for DeepLIFT).
+        """
+        if not self.is_loaded:
+            raise ValueError("Model not loaded")
+
+        if not legs:
+            raise ValueError("Voyage needs at least one leg")
+
+        if explain and mode == 'kernel' and len(legs) > MAX_SHAP_BATCH_ROWS:
+            raise ValueError(f"SHAP is limited to {MAX_SHAP_BATCH_ROWS} legs per voyage, got {len(legs)}")
+
+        rows = [{**shared_input, **leg} for leg in legs]
+        processed_input = self._transform(rows)
+        with self.metrics.stage('predict'):
+            predictions = np.asarray(self._predict_processed(processed_input), dtype=np.float64)
+
+        distance = np.array([row['Distance_NM'] for row in rows], dtype=np.float64)
+        speed = np.array([row['Avg_Speed_Knots'] for row in rows], dtype=np.float64)
+        with np.errstate(divide='ignore'):
+            transit_hours = np.where(speed > 0, distance / speed, np.inf)
+
+        total_fuel = float(predictions.sum())
+        total_hours = float(transit_hours.sum())
+        result = {
+            "predicted_fuel_tons": round(total_fuel, 2),
+            "total_distance_nm": round(float(distance.sum()), 2),
+            "total_transit_hours": round(total_hours, 2) if np.isfinite(total_hours) else None,
+            "legs": [
+                {
+                    "leg": i,
+                    "predicted_fuel_tons": round(float(fuel), 2),
+                    "transit_hours": round(float(hours), 2) if np.isfinite(hours) else None
+                }
+                for i, (fuel, hours) in enumerate(zip(predictions, transit_hours))
+            ]
+        }
+
+        if not explain:
+            return result
+
+        attribution_matrix, base_value = self._attribution_matrix(processed_input, predictions, mode)
+        summed = self._build_result(total_fuel, np.asarray(attribution_matrix).sum(axis=0), shared_input)
+        result["contributions"] = summed["contributions"]
+        result["text_explanation"] = summed["text_explanation"]
+        result["attribution_mode"] = mode
+        # The summed attributions are relative to one base value per leg
+        result["base_value"] = round(base_value * len(legs), 4)
+        return result
+
+    def _sweep_axis_size(self, axis):
+        """
+        Number of points on an axis, known without building them.
+        """
+        if axis.get('values') is not None:
+            size = len(axis['values'])
+        elif None not in (axis.get('start'), axis.get('stop'), axis.get('num')):
+            size = int(axis['num'])
+        else:
+            raise ValueError(f"Sweep over {axis.get('field')} needs 'values' or 'start', 'stop' and 'num'")
+        if size < 1:
+            raise ValueError(f"Sweep over {axis.get('field')} has no values")
+        return size
+
+    def _sweep_axis_values(self, axis):
+        """
+        Explicit `values`, or `num` evenly spaced points from `start` to `stop` inclusive.
+        """
+        if axis.get('values') is not None:
+            return list(axis['values'])
+        return np.linspace(axis['start'], axis['stop'], int(axis['num'])).tolist()
+
+    def _sweep_matrix(self, base_input, fields, grids):
+        """
+        Processed matrix for the grid: the base row is transformed once and tiled,
+        then each swept column is overwritten in processed space.
+        """
+        if self.pipeline is None:
+            records = []
+            for point in zip(*grids):
+                record = dict(base_input)
+                record.update(zip(fields, point))
+                records.append(record)
+            return self._transform(records)
+
+        pipeline = self.pipeline
+        X = np.tile(pipeline.transform_records([base_input]), (len(grids[0]), 1))
+        for field, grid in zip(fields, grids):
+            if field in pipeline.numerical_cols:
+                j = pipeline.numerical_cols.index(field)
+                X[:, j] = (np.asarray(grid, dtype=np.float64) - pipeline.mean[j]) / pipeline.scale[j]
+            else:
+                c = pipeline.categorical_cols.index(field)
+                index = pipeline.category_index[c]
+                block = list(index.values())
+                X[:, block] = 0.0
+                for value in set(grid):
+                    column = index.get(value)
+                    if column is None:
+                        pipeline.check_unknown(field, value)
+                    else:
+                        X[np.asarray(grid, dtype=object) == value, column] = 1.0
+        return X
+
+    def sweep(self, base_input: dict, axes, max_transit_hours=None):
+        """
+        Scores a 1-D or 2-D grid of what-if variations of one voyage in a single
+        forward pass. `axes` is a list of {'field', 'values'} or {'field', 'start',
+        'stop', 'num'} dicts. Returns the fuel curve, tons/day and transit time on the
+        grid and, when `max_transit_hours` is given, the fuel-minimising feasible point.
+        No attributions are computed.
+        """
+        if not self.is_loaded:
+            raise ValueError("Model not loaded")
+
+        if not 1 <= len(axes) <= MAX_SWEEP_AXES:
+            raise ValueError(f"Sweep takes 1 to {MAX_SWEEP_AXES} axes, got {len(axes)}")
+
+        fields = [axis.get('field') for axis in axes]
+        if len(set(fields)) != len(fields):
+            raise ValueError(f"Swept fields must be distinct, got {fields}")
+        for field in fields:
+            if field not in base_input:
+                raise ValueError(f"Unknown sweep field '{field}'")
+
+        # Checked before any axis is expanded, so an oversized request costs nothing
+        shape = tuple(self._sweep_axis_size(axis) for axis in axes)
+        n_points = math.prod(shape)
+        if n_points > MAX_SWEEP_POINTS:
+            raise ValueError(f"Sweep limited to {MAX_SWEEP_POINTS} points, got {n_points}")
+        axis_values = [self._sweep_axis_values(axis) for axis in axes]
+
+        # Flattened grid in C order: the last axis varies fastest
+        mesh = np.meshgrid(*[np.asarray(values, dtype=object) for values in axis_values], indexing='ij')
+        grids = [m.ravel() for m in mesh]
+
+        with self.metrics.stage('sweep'):
+            processed = self._sweep_matrix(base_input, fields, grids)
+            fuel = np.asarray(self._predict_processed(processed), dtype=np.float64)
+
+        columns = dict(zip(fields, grids))
+        distance = np.asarray(columns.get('Distance_NM', np.full(n_points, base_input['Distance_NM'])), dtype=np.float64)
+        speed = np.asarray(columns.get('Avg_Speed_Knots', np.full(n_points, base_input['Avg_Speed_Knots'])), dtype=np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            transit_hours = np.where(speed > 0, distance / speed, np.inf)
+            tons_per_day = np.where(np.isfinite(transit_hours), fuel / (transit_hours / 24.0), np.nan)
+
+        def grid_list(values, decimals):
+            rounded = np.round(values, decimals)
+            # JSON has no inf/nan
+            return np.where(np.isfinite(rounded), rounded, None).reshape(shape).tolist()
+
+        result = {
+            "fields": fields,
+            "values": {field: values for field, values in zip(fields, axis_values)},
+            "shape": list(shape),
+            "points": n_points,
+            "predicted_fuel_tons": grid_list(fuel, 2),
+            "tons_per_day": grid_list(tons_per_day, 2),
+            "transit_hours": grid_list(transit_hours, 2)
+        }
+
+        if max_transit_hours is not None:
+            feasible = np.flatnonzero(transit_hours <= max_transit_hours)
+            optimum = None
+            if feasible.size:
+                best = int(feasible[np.argmin(fuel[feasible])])
+                optimum = {
+                    "index": [int(i) for i in np.unravel_index(best, shape)],
+                    "inputs": {field: grid[best] for field, grid in columns.items()},
+                    "predicted_fuel_tons": round(float(fuel[best]), 2),
+                    "tons_per_day": round(float(tons_per_day[best]), 2),
+                    "transit_hours": round(float(transit_hours[best]), 2)
+                }
+            result["max_transit_hours"] = max_transit_hours
+            result["optimum"] = optimum
+
+        return result
+
     def _aggregate_contributions(self, contributions):
         aggregated = {}
         for key, val in contributions.items():
@@ -131,15 +871,15 @@ class ExplainerService:
     def _generate_text(self, contributions, estimate, input_data):
         sorted_impacts = sorted(contributions.items(), key=lambda x: abs(x[1]), reverse=True)
         top_factors = sorted_impacts[:3]
-        
+
         explanation_lines = [
             f"The estimated fuel consumption is **{estimate:.2f} tons**."
         ]
-        
+
         for feature, impact in top_factors:
             direction = "increased" if impact > 0 else "decreased"
             clean_feat = feature.replace('_', ' ')
-            
+
             reason = ""
             if "Wave Height" in clean_feat and impact > 0:
                 reason = "due to added resistance from rough seas"
@@ -149,8 +889,8 @@ class ExplainerService:
                 reason = "(higher speeds drastically increase power demand)"
             elif "Season" in clean_feat and "Southwest" in feature:
                 reason = "reflecting monsoon conditions"
-            
+
             line = f"- **{clean_feat}** {direction} consumption by {abs(impact):.2f} tons {reason}."
             explanation_lines.append(line)
-            
+
         return "\n".join(explanation_lines)
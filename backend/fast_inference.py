@@ -0,0 +1,236 @@
+import numpy as np
+
+# Relative tolerance against the sklearn path, per weight dtype
+PARITY_RTOL = {np.dtype(np.float64): 1e-9, np.dtype(np.float32): 1e-4}
+
+
+class CompiledPipeline:
+    """
+    Lean inference path for the fitted ColumnTransformer + MLPRegressor.
+
+    Holds the scaler statistics, a dict per categorical column mapping each
+    category to its one-hot column, and contiguous weight matrices, so raw
+    records go to predictions without pandas or sklearn validation.
+
+    `coefs` / `intercepts` may also be lists of per-member weights for a seed
+    ensemble; predictions are then the mean over members.
+    """
+
+    def __init__(self, numerical_cols, mean, scale, categorical_cols, categories, coefs, intercepts,
+                 handle_unknown='ignore', dtype=np.float64):
+        self.dtype = np.dtype(dtype)
+        self.numerical_cols = list(numerical_cols)
+        self.categorical_cols = list(categorical_cols)
+        self.categories = [list(values) for values in categories]
+        self.handle_unknown = handle_unknown
+
+        self.mean = np.ascontiguousarray(mean, dtype=np.float64)
+        self.scale = np.ascontiguousarray(scale, dtype=np.float64)
+
+        # Category -> absolute column index in the processed matrix
+        self.category_index = []
+        offset = len(self.numerical_cols)
+        for values in self.categories:
+            self.category_index.append({value: offset + i for i, value in enumerate(values)})
+            offset += len(values)
+        self.n_features = offset
+
+        # A single model is stored as a one-member ensemble
+        if isinstance(coefs[0], np.ndarray):
+            coefs, intercepts = [coefs], [intercepts]
+        self.members = [
+            ([np.ascontiguousarray(W, dtype=self.dtype) for W in member_coefs],
+             [np.ascontiguousarray(b, dtype=self.dtype) for b in member_intercepts])
+            for member_coefs, member_intercepts in zip(coefs, intercepts)
+        ]
+        self.coefs, self.intercepts = self.members[0]
+
+        for member_coefs, _ in self.members:
+            if member_coefs[0].shape[0] != self.n_features:
+                raise ValueError(f"Model expects {member_coefs[0].shape[0]} features, preprocessor produces {self.n_features}")
+
+        self._stack_members()
+
+    def _stack_members(self):
+        """
+        Members with identical layer shapes share one first-layer matmul (weights
+        concatenated side by side) and batched matmuls after that.
+        """
+        self.stacked = None
+        shapes = [[W.shape for W in member_coefs] for member_coefs, _ in self.members]
+        if len(self.members) < 2 or any(shape != shapes[0] for shape in shapes):
+            return
+
+        first = np.ascontiguousarray(np.concatenate([member_coefs[0] for member_coefs, _ in self.members], axis=1))
+        first_bias = np.concatenate([member_intercepts[0] for _, member_intercepts in self.members])
+        rest = [
+            (np.stack([member_coefs[i] for member_coefs, _ in self.members]),
+             np.stack([member_intercepts[i] for _, member_intercepts in self.members])[:, None, :])
+            for i in range(1, len(shapes[0]))
+        ]
+        self.stacked = (first, first_bias, rest)
+
+    @classmethod
+    def from_sklearn(cls, preprocessor, model, dtype=np.float64):
+        """
+        Compiles a fitted ColumnTransformer(StandardScaler, OneHotEncoder) and ReLU MLPRegressor,
+        or a list of them forming a seed ensemble.
+        Raises ValueError for anything this path cannot reproduce exactly.
+        """
+        if preprocessor.remainder != 'drop':
+            raise ValueError("Only ColumnTransformer(remainder='drop') can be compiled")
+
+        transformers = {name: (transformer, columns) for name, transformer, columns in preprocessor.transformers_}
+        if [name for name, _, _ in preprocessor.transformers_ if name != 'remainder'] != ['num', 'cat']:
+            raise ValueError("Expected exactly the 'num' and 'cat' transformers, in that order")
+
+        scaler, numerical_cols = transformers['num']
+        encoder, categorical_cols = transformers['cat']
+        if getattr(encoder, 'drop_idx_', None) is not None or getattr(encoder, '_infrequent_enabled', False):
+            raise ValueError("OneHotEncoder with drop or infrequent categories cannot be compiled")
+
+        n_numerical = len(numerical_cols)
+        mean = scaler.mean_ if scaler.with_mean else np.zeros(n_numerical)
+        scale = scaler.scale_ if scaler.with_std else np.ones(n_numerical)
+
+        models = model if isinstance(model, (list, tuple)) else [model]
+        for member in models:
+            if getattr(member, 'activation', None) != 'relu' or getattr(member, 'out_activation_', None) != 'identity':
+                raise ValueError("Only ReLU MLPRegressor models with identity output can be compiled")
+
+        return cls(
+            numerical_cols, mean, scale,
+            categorical_cols, encoder.categories_,
+            [member.coefs_ for member in models], [member.intercepts_ for member in models],
+            handle_unknown=encoder.handle_unknown, dtype=dtype
+        )
+
+    def check_unknown(self, column, value):
+        """
+        Called for a category the encoder never saw. Raises unless unknowns are ignored,
+        in which case the value encodes as all zeros, like OneHotEncoder(handle_unknown='ignore').
+        """
+        if self.handle_unknown != 'ignore':
+            raise ValueError(f"Found unknown category {value!r} in column {column}")
+
+    def transform_records(self, records):
+        """
+        Raw input dicts -> processed feature matrix.
+        """
+        n = len(records)
+        X = np.zeros((n, self.n_features), dtype=np.float64)
+
+        numerics = np.array([[record[col] for col in self.numerical_cols] for record in records], dtype=np.float64)
+        X[:, :len(self.numerical_cols)] = (numerics.reshape(n, -1) - self.mean) / self.scale
+
+        for col, index in zip(self.categorical_cols, self.category_index):
+            for row, record in enumerate(records):
+                column = index.get(record[col])
+                if column is None:
+                    self.check_unknown(col, record[col])
+                else:
+                    X[row, column] = 1.0
+        return X
+
+    def transform_columns(self, columns):
+        """
+        Column-oriented input (dict of arrays, DataFrame, or NumPy record array) -> processed matrix.
+        """
+        first = self.numerical_cols[0] if self.numerical_cols else self.categorical_cols[0]
+        n = len(columns[first])
+        X = np.zeros((n, self.n_features), dtype=np.float64)
+
+        for j, col in enumerate(self.numerical_cols):
+            X[:, j] = (np.asarray(columns[col], dtype=np.float64) - self.mean[j]) / self.scale[j]
+
+        rows = np.arange(n)
+        for col, index in zip(self.categorical_cols, self.category_index):
+            values = np.asarray(columns[col], dtype=object)
+            uniques, inverse = np.unique(values, return_inverse=True)
+            lookup = np.array([index.get(value, -1) for value in uniques], dtype=np.int64)
+            target = lookup[inverse.ravel()]
+            known = target >= 0
+            if not known.all():
+                self.check_unknown(col, values[~known][0])
+            X[rows[known], target[known]] = 1.0
+        return X
+
+    @staticmethod
+    def _forward(X, coefs, intercepts):
+        activation = X
+        last = len(coefs) - 1
+        for i, (W, b) in enumerate(zip(coefs, intercepts)):
+            activation = activation @ W
+            activation += b
+            if i != last:
+                np.maximum(activation, 0, out=activation)
+        return activation[..., 0]
+
+    def predict_matrix(self, X):
+        X = np.asarray(X, dtype=self.dtype)
+        if len(self.members) == 1:
+            return self._forward(X, self.coefs, self.intercepts).astype(np.float64)
+
+        if self.stacked is None:
+            return np.mean([self._forward(X, *member) for member in self.members], axis=0, dtype=np.float64)
+
+        first, first_bias, rest = self.stacked
+        n, k = X.shape[0], len(self.members)
+        activation = X @ first
+        activation += first_bias
+        if rest:
+            np.maximum(activation, 0, out=activation)
+        # (n, k * h) -> (k, n, h), one slice per member
+        activation = activation.reshape(n, k, -1).transpose(1, 0, 2)
+        last = len(rest) - 1
+        for i, (W, b) in enumerate(rest):
+            activation = np.matmul(activation, W)
+            activation += b
+            if i != last:
+                np.maximum(activation, 0, out=activation)
+        return activation[..., 0].mean(axis=0, dtype=np.float64)
+
+    def predict_records(self, records):
+        return self.predict_matrix(self.transform_records(records))
+
+    def predict_columns(self, columns):
+        return self.predict_matrix(self.transform_columns(columns))
+
+    def probe_records(self, n=8):
+        """
+        Deterministic raw records that cover every category, for parity checks.
+        """
+        n = max(n, max((len(values) for values in self.categories), default=1))
+        offsets = np.linspace(-2.0, 2.0, n)
+        records = []
+        for i in range(n):
+            record = {col: float(self.mean[j] + offsets[i] * self.scale[j]) for j, col in enumerate(self.numerical_cols)}
+            for col, values in zip(self.categorical_cols, self.categories):
+                record[col] = values[i % len(values)]
+            records.append(record)
+        return records
+
+    def check_parity(self, preprocessor, model, records=None):
+        """
+        Compares this path against preprocessor.transform + model.predict
+        (averaged over members when `model` is a list). Returns the max absolute prediction gap or raises ValueError past tolerance.
+        """
+        import pandas as pd
+
+        records = records if records is not None else self.probe_records()
+        frame = pd.DataFrame(records)
+
+        expected_X = preprocessor.transform(frame)
+        models = model if isinstance(model, (list, tuple)) else [model]
+        expected = np.mean([member.predict(expected_X) for member in models], axis=0)
+        actual_X = self.transform_records(records)
+        actual = self.predict_matrix(actual_X)
+
+        if not np.allclose(actual_X, expected_X, rtol=0, atol=1e-12):
+            raise ValueError("Compiled transform does not match the sklearn preprocessor")
+
+        rtol = PARITY_RTOL.get(self.dtype, 1e-4)
+        gap = float(np.max(np.abs(actual - expected)))
+        if not np.allclose(actual, expected, rtol=rtol, atol=rtol):
+            raise ValueError(f"Compiled predictions differ from sklearn by up to {gap:.3e}")
+        return gap
@@ -1,9 +1,24 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Header
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from fastapi import Request
+from pydantic import ValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from explainability import ExplainerService
+from starlette.concurrency import run_in_threadpool
+from typing import Optional
+from schemas import VoyageInput, MultiLegVoyageInput, BatchPredictInput, SweepInput, ReloadInput
+from explainability import ExplainerService, service_paths, MAX_SHAP_BATCH_ROWS, ATTRIBUTION_MODES, MAX_SWEEP_AXES, EXPLANATION_TIERS
+from model_bundle import is_bundle, DEFAULT_BUNDLE_DIR
+from prediction_cache import PredictionCache, parse_precision
+from batching import MicroBatcher
+from request_log import RequestLogger
+import metrics
 import uvicorn
 import os
+import time
+import hmac
+import json
+import threading
+import numpy as np
 
 app = FastAPI(title="Maritime Fuel XAI API")
 
@@ -14,71 +29,528 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
-# Input Schema
-class VoyageInput(BaseModel):
-    # 1. Vessel
-    Ship_Type: str
-    DWT: float
-    GT: float
-    LOA: float
-    Beam: float
-    Design_Speed: float
-    Draft_Percentage: float
-    Hull_Fouling: str
-
-    # 2. Propulsion
-    Main_Engine_Type: str
-    Engine_Power_kW: float
-    SFOC_g_kWh: float
-    Propeller_Type: str
-
-    # 3. Voyage
-    Distance_NM: float
-    Avg_Speed_Knots: float
-    Speed_Profile: str
-
-    # 4. Environment
-    Season: str
-    Wind_Beaufort: int
-    Wind_Direction: str
-    Wave_Height_m: float
-    Current_Speed_Knots: float
-    Current_Direction: str
-
-    # 5. Fuel & Ops
-    Fuel_Type: str
-    Weather_Routing_Efficiency: float
+# Batch limit; rows are validated one by one so a bad voyage does not reject the whole batch
+MAX_BATCH_ROWS = 10000
+
+# Artifacts are read from this directory (defaults to the working directory, as before)
+ARTIFACT_DIR = os.environ.get("VESSELFUEL_ARTIFACT_DIR", ".")
+# Served instead of the pickles when it exists
+BUNDLE_DIR = os.environ.get("VESSELFUEL_BUNDLE_DIR", os.path.join(ARTIFACT_DIR, DEFAULT_BUNDLE_DIR))
+# /model/reload is disabled unless this is set; callers send it as X-Admin-Token
+ADMIN_TOKEN = os.environ.get("VESSELFUEL_ADMIN_TOKEN", "")
+# VESSELFUEL_LAZY_SHAP=1 skips importing shap and building KernelExplainer at startup;
+# the first kernel explanation pays for it instead
+LAZY_SHAP = os.environ.get("VESSELFUEL_LAZY_SHAP", "0") == "1"
+# VESSELFUEL_SHAP_WORKERS=N explains kernel batches on an N-process pool (0 keeps SHAP in-process)
+SHAP_WORKERS = int(os.environ.get("VESSELFUEL_SHAP_WORKERS", "0"))
+# Start that pool during warm-up. serve.py turns this off: a pool started before the fork
+# would be shared by every worker, so each worker starts its own on first use instead
+WARM_SHAP_POOL = True
+
+# Cache Config
+# VESSELFUEL_CACHE_SIZE=0 disables the cache.
+# VESSELFUEL_CACHE_PRECISION snaps fields before hashing, e.g. "Wave_Height_m=1,Avg_Speed_Knots=1"
+CACHE_SIZE = int(os.environ.get("VESSELFUEL_CACHE_SIZE", "2048"))
+CACHE_TTL_SECONDS = float(os.environ.get("VESSELFUEL_CACHE_TTL", "600"))
+CACHE_PRECISION = parse_precision(os.environ.get("VESSELFUEL_CACHE_PRECISION", ""))
+
+# Micro-batching Config
+# Concurrent /predict calls are grouped into one explain_batch call.
+# VESSELFUEL_BATCH_MAX_SIZE=1 turns batching off.
+BATCH_MAX_SIZE = int(os.environ.get("VESSELFUEL_BATCH_MAX_SIZE", "32"))
+BATCH_MAX_WAIT_MS = float(os.environ.get("VESSELFUEL_BATCH_MAX_WAIT_MS", "5"))
+
+# Overload Config
+# Each further VESSELFUEL_DEGRADE_INFLIGHT concurrent /predict calls step explanations down
+# one tier (full -> reduced -> fast -> none). 0 turns automatic degradation off.
+DEGRADE_INFLIGHT = int(os.environ.get("VESSELFUEL_DEGRADE_INFLIGHT", "16"))
+
+# Metrics Config
+# VESSELFUEL_METRICS=0 turns stage timing off; VESSELFUEL_SERVER_TIMING=1 adds Server-Timing headers.
+METRICS_ENABLED = os.environ.get("VESSELFUEL_METRICS", "1") == "1"
+SERVER_TIMING_ENABLED = METRICS_ENABLED and os.environ.get("VESSELFUEL_SERVER_TIMING", "0") == "1"
+registry = metrics.MetricsRegistry(enabled=METRICS_ENABLED)
+
+# Request Log Config
+# VESSELFUEL_REQUEST_LOG_DIR turns on the /predict request log (replay it with replay.py).
+# Files rotate past VESSELFUEL_REQUEST_LOG_MAX_MB; VESSELFUEL_REQUEST_LOG_MAX_FILES=0 keeps them all.
+REQUEST_LOG_DIR = os.environ.get("VESSELFUEL_REQUEST_LOG_DIR", "")
+REQUEST_LOG_MAX_MB = float(os.environ.get("VESSELFUEL_REQUEST_LOG_MAX_MB", "64"))
+REQUEST_LOG_MAX_FILES = int(os.environ.get("VESSELFUEL_REQUEST_LOG_MAX_FILES", "0"))
 
 # Global Service
+# Handlers read `explainer` once per request, so a reload swaps it without dropping calls in flight
 explainer = None
+batcher = None
+cache = None
+request_log = None
+reload_lock = threading.Lock()
+reload_state = {"status": "idle", "bundle_path": None, "version": None, "error": None}
+# /predict calls currently being served; only touched on the event loop
+inflight_predictions = 0
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    if not METRICS_ENABLED:
+        return await call_next(request)
+
+    # The request log records stage timings even when Server-Timing headers are off
+    timings = {} if SERVER_TIMING_ENABLED or request_log is not None else None
+    token = metrics.request_timings.set(timings)
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        metrics.request_timings.reset(token)
+        # Unknown paths share one label so 404 scans cannot blow up cardinality
+        path = request.url.path if request.url.path in KNOWN_PATHS else "other"
+        registry.observe_request(path, status, time.perf_counter() - started)
+
+    if timings and SERVER_TIMING_ENABLED:
+        response.headers["Server-Timing"] = metrics.server_timing_header(timings)
+    return response
+
+def build_service(bundle_path=None):
+    # Directories are read at call time, so a reload sees the current configuration
+    return ExplainerService(
+        **service_paths(ARTIFACT_DIR, bundle_path or BUNDLE_DIR),
+        cache=cache,
+        metrics=registry,
+        warm_kernel=not LAZY_SHAP,
+        shap_workers=SHAP_WORKERS,
+        warm_shap_pool=WARM_SHAP_POOL
+    )
 
 @app.on_event("startup")
 def load_model():
-    global explainer
+    global explainer, cache
+    if explainer is not None:
+        # Pre-forked worker (serve.py): the parent already loaded and warmed the model
+        return
+    if CACHE_SIZE > 0:
+        cache = PredictionCache(max_entries=CACHE_SIZE, ttl_seconds=CACHE_TTL_SECONDS, precision=CACHE_PRECISION)
     try:
-        explainer = ExplainerService()
+        explainer = build_service()
     except Exception as e:
         print(f"Error loading model: {e}")
 
+def score_micro_batch(items):
+    """
+    Runs in a worker thread. Items are (service, input_dict, attribution_mode, tier, timings,
+    prepared) tuples: the service the request started with (a reload may have swapped the
+    global since), and ExplainerService.prepare output for the row or None. Items sharing
+    a service, mode, tier and preparedness are scored as one batch; results are returned in
+    item order. Stage timings of the batch are copied to every request that has a timings dict.
+    """
+    results = [None] * len(items)
+    groups = {}
+    for index, (service, _, mode, tier, _, prepared) in enumerate(items):
+        groups.setdefault((service, mode, tier, prepared is not None), []).append(index)
+
+    for (service, mode, tier, is_prepared), indices in groups.items():
+        prepared = None
+        if is_prepared:
+            prepared = (np.vstack([items[i][5][0] for i in indices]),
+                        np.concatenate([items[i][5][1] for i in indices]))
+        batch_timings = {}
+        token = metrics.request_timings.set(batch_timings)
+        try:
+            scored = service.explain_batch([items[i][1] for i in indices], explain=True, mode=mode, tier=tier,
+                                           prepared=prepared)
+        except Exception as e:
+            scored = [e] * len(indices)
+        finally:
+            metrics.request_timings.reset(token)
+
+        for index, result in zip(indices, scored):
+            results[index] = result
+            timings = items[index][4]
+            if timings is not None:
+                timings.update(batch_timings)
+    return results
+
+@app.on_event("startup")
+async def start_batcher():
+    global batcher
+    if BATCH_MAX_SIZE > 1:
+        batcher = MicroBatcher(
+            score_batch=score_micro_batch,
+            max_batch_size=min(BATCH_MAX_SIZE, MAX_SHAP_BATCH_ROWS),
+            max_wait_ms=BATCH_MAX_WAIT_MS
+        )
+        await batcher.start()
+
+@app.on_event("shutdown")
+async def stop_batcher():
+    if batcher is not None:
+        await batcher.stop()
+
+@app.on_event("shutdown")
+def stop_shap_pool():
+    if explainer is not None:
+        explainer.close()
+
+@app.on_event("startup")
+def start_request_log():
+    global request_log
+    if REQUEST_LOG_DIR:
+        request_log = RequestLogger(REQUEST_LOG_DIR, max_bytes=int(REQUEST_LOG_MAX_MB * 1024 * 1024),
+                                    max_files=REQUEST_LOG_MAX_FILES)
+
+@app.on_event("shutdown")
+def stop_request_log():
+    global request_log
+    if request_log is not None:
+        request_log.close()
+        request_log = None
+
+def log_prediction(path, service, input_dict, mode, requested_tier, budget_ms, result, started, timings):
+    """
+    One flat record per answered prediction: the inputs, what was served and how long each
+    stage took. Only a deque append happens here; encoding and disk writes are off the request path.
+    """
+    logger = request_log
+    if logger is None:
+        return
+    record = {
+        "ts": time.time(),
+        "path": path,
+        "model_version": service.model_version,
+        "attribution_mode": mode,
+        "requested_tier": requested_tier,
+        "latency_budget_ms": budget_ms,
+        "explanation_tier": result.get("explanation_tier"),
+        "predicted_fuel_tons": result.get("predicted_fuel_tons"),
+        "latency_ms": (time.perf_counter() - started) * 1000,
+    }
+    for name, value in input_dict.items():
+        record[f"input.{name}"] = value
+    for name, seconds in (timings or {}).items():
+        record[f"stage.{name}"] = seconds * 1000
+    logger.log(record)
+
+@app.get("/batching/stats")
+def batching_stats():
+    if batcher is None:
+        return {"enabled": False}
+    return {"enabled": True, **batcher.stats()}
+
+@app.get("/metrics")
+def prometheus_metrics():
+    service = explainer
+    model_loaded = service is not None and service.is_loaded
+    gauges = [
+        ("vesselfuel_model_loaded", "1 if model artifacts are loaded.", model_loaded),
+        ("vesselfuel_explainer_ready", "1 once the explainer has been warmed.", model_loaded and service.ready),
+        ("vesselfuel_model_load_seconds", "Wall time of the last artifact load and warm-up.",
+         (service.load_seconds or 0.0) if model_loaded else 0.0),
+    ]
+    counters = []
+    if model_loaded and service.cache is not None:
+        stats = service.cache.stats()
+        gauges.append(("vesselfuel_cache_entries", "Entries in the prediction cache.", stats["entries"]))
+        counters += [
+            ("vesselfuel_cache_hits_total", "Prediction cache hits since start.", stats["hits"]),
+            ("vesselfuel_cache_misses_total", "Prediction cache misses since start.", stats["misses"]),
+            ("vesselfuel_cache_evictions_total", "Prediction cache LRU evictions since start.", stats["evictions"]),
+            ("vesselfuel_cache_expirations_total", "Prediction cache entries expired by TTL since start.", stats["expirations"]),
+        ]
+    if batcher is not None:
+        stats = batcher.stats()
+        gauges += [
+            ("vesselfuel_batch_queue_depth", "Requests waiting for a micro-batch.", stats["queue_depth"]),
+            ("vesselfuel_batch_mean_size", "Mean micro-batch size since start.", stats["mean_batch_size"]),
+        ]
+    if request_log is not None:
+        stats = request_log.stats()
+        gauges.append(("vesselfuel_request_log_pending", "Requests buffered for the next log flush.", stats["pending"]))
+        counters += [
+            ("vesselfuel_request_log_records_total", "Requests added to the request log since start.", stats["logged"]),
+            ("vesselfuel_request_log_dropped_total", "Requests dropped because the log buffer was full.", stats["dropped"]),
+            ("vesselfuel_request_log_write_errors_total", "Request log blocks that failed to write.", stats["write_errors"]),
+        ]
+    gauges.append(("vesselfuel_predict_inflight", "/predict and /predict/stream calls currently being served.", inflight_predictions))
+    return PlainTextResponse(registry.render(gauges, counters), media_type="text/plain; version=0.0.4")
+
 @app.get("/health")
 def health_check():
-    return {"status": "operational", "model_loaded": explainer.model is not None}
+    service = explainer
+    model_loaded = service is not None and service.is_loaded
+    ready = model_loaded and service.ready
+    if model_loaded and not ready:
+        # A failed warm-up would otherwise keep the pod unready for good; retry off the probe's thread
+        threading.Thread(target=service.retry_warm_up, daemon=True).start()
+    # No model is a different fault from a cold one: warming clears itself, unavailable needs training or a reload
+    status = "operational" if ready else "warming" if model_loaded else "unavailable"
+    body = {"status": status, "model_loaded": model_loaded, "ready": ready}
+    # Readiness probes should only route traffic once the explainer is warm
+    return body if ready else JSONResponse(status_code=503, content=body)
+
+@app.get("/cache/stats")
+def cache_stats():
+    if not explainer or explainer.cache is None:
+        return {"enabled": False}
+    return {"enabled": True, "model_version": explainer.model_version, **explainer.cache.stats()}
+
+@app.get("/model")
+def model_info():
+    service = explainer
+    if service is None or not service.is_loaded:
+        return {"loaded": False, "reload": reload_state}
+
+    info = {"loaded": True, "version": service.model_version, "ready": service.ready, "reload": reload_state}
+    if service.bundle is not None:
+        manifest = service.bundle.manifest
+        info.update(source="bundle", bundle_path=service.bundle_path, created=manifest["created"],
+                    model=manifest["model"], training_metrics=manifest["training_metrics"])
+    else:
+        info.update(source="pickle", members=len(service.members))
+    return info
+
+def swap_in_bundle(bundle_path):
+    """
+    Loads and warms a new service off the request path, then rebinds the global.
+    Requests already holding the old service finish on it. On failure the old one stays.
+    """
+    global explainer
+    try:
+        service = build_service(bundle_path=bundle_path)
+        if not service.is_loaded:
+            raise ValueError(f"No model could be loaded from {bundle_path}")
+        retired, previous = explainer, (explainer.model_version if explainer is not None else None)
+        explainer = service
+        if retired is not None:
+            retired.close()
+        reload_state.update(status="ready", version=service.model_version, previous_version=previous, error=None)
+        print(f"Model reloaded: {previous} -> {service.model_version}")
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        reload_state.update(status="failed", error=str(e))
+    finally:
+        reload_lock.release()
+
+@app.post("/model/reload", status_code=202)
+def reload_model(background_tasks: BackgroundTasks, body: Optional[ReloadInput] = None,
+                 x_admin_token: Optional[str] = Header(None)):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Model reload is disabled. Set VESSELFUEL_ADMIN_TOKEN to enable it.")
+    if not hmac.compare_digest((x_admin_token or "").encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+    bundle_path = (body.bundle_path if body else None) or BUNDLE_DIR
+    if not is_bundle(bundle_path):
+        raise HTTPException(status_code=404, detail=f"No model bundle at {bundle_path}")
+
+    if not reload_lock.acquire(blocking=False):
+        raise HTTPException(status_code=409, detail="A reload is already in progress")
+
+    reload_state.update(status="loading", bundle_path=bundle_path, error=None)
+    background_tasks.add_task(swap_in_bundle, bundle_path)
+    return {"status": "loading", "bundle_path": bundle_path,
+            "current_version": explainer.model_version if explainer is not None else None}
+
+def overload_steps():
+    """
+    Tiers to shed for the current load: one per DEGRADE_INFLIGHT calls already in flight.
+    """
+    if DEGRADE_INFLIGHT <= 0:
+        return 0
+    return max(inflight_predictions - 1, 0) // DEGRADE_INFLIGHT
+
+def check_explanation_params(attribution_mode, explanation, latency_budget_ms):
+    if attribution_mode not in ATTRIBUTION_MODES:
+        raise HTTPException(status_code=400, detail=f"attribution_mode must be one of {list(ATTRIBUTION_MODES)}")
+
+    if explanation not in EXPLANATION_TIERS:
+        raise HTTPException(status_code=400, detail=f"explanation must be one of {list(EXPLANATION_TIERS)}")
+
+    if latency_budget_ms is not None and latency_budget_ms < 0:
+        raise HTTPException(status_code=400, detail="latency_budget_ms must be non-negative")
 
 @app.post("/predict")
-def predict_fuel(data: VoyageInput):
-    if not explainer or not explainer.model:
+async def predict_fuel(data: VoyageInput, attribution_mode: str = "kernel", explanation: str = "full",
+                       latency_budget_ms: Optional[float] = None):
+    global inflight_predictions
+    service = explainer
+    if not service or not service.is_loaded:
         raise HTTPException(status_code=503, detail="Model not loaded yet. backend might be training.")
-    
+
+    check_explanation_params(attribution_mode, explanation, latency_budget_ms)
+
+    inflight_predictions += 1
+    started = time.perf_counter()
     try:
+        tier = service.choose_tier(explanation, latency_budget_ms, overload_steps(), attribution_mode)
         input_dict = data.dict()
-        result = explainer.explain(input_dict)
-        return result
+        timings = metrics.request_timings.get()
+        if batcher is not None:
+            result = await batcher.submit((service, input_dict, attribution_mode, tier, timings, None))
+        else:
+            result = await run_in_threadpool(service.explain, input_dict, mode=attribution_mode, tier=tier)
+        log_prediction("/predict", service, input_dict, attribution_mode, explanation, latency_budget_ms, result, started, timings)
+        return {**result, "requested_tier": explanation, "degraded": tier != explanation}
     except Exception as e:
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        inflight_predictions -= 1
 
     # Force reload trigger (Attempt 2)
     uvicorn.run(app, host="0.0.0.0", port=8000)
+
+def explain_timed(service, input_dict, mode, tier, timings, prepared=None):
+    token = metrics.request_timings.set(timings)
+    try:
+        return service.explain_batch([input_dict], explain=True, mode=mode, tier=tier, prepared=prepared)[0]
+    finally:
+        metrics.request_timings.reset(token)
+
+@app.post("/predict/stream")
+async def predict_fuel_stream(data: VoyageInput, attribution_mode: str = "kernel", explanation: str = "full",
+                              latency_budget_ms: Optional[float] = None):
+    """
+    Same inputs as /predict, answered as NDJSON in two events: "prediction" as soon as the
+    forward pass is done, then "explanation" (the full /predict body) once attributions finish
+    off the event loop. A failure after the first event arrives as an "error" event.
+    """
+    service = explainer
+    if not service or not service.is_loaded:
+        raise HTTPException(status_code=503, detail="Model not loaded yet. backend might be training.")
+
+    check_explanation_params(attribution_mode, explanation, latency_budget_ms)
+
+    input_dict = data.dict()
+
+    def event(kind, body):
+        return (json.dumps({"event": kind, **body}) + "\n").encode()
+
+    async def events():
+        global inflight_predictions
+        inflight_predictions += 1
+        started = time.perf_counter()
+        # The response body outlives the middleware's timings, so the stream keeps its own
+        timings = {} if request_log is not None else None
+        try:
+            tier = service.choose_tier(explanation, latency_budget_ms, overload_steps(), attribution_mode)
+            # The explanation below reuses this preprocess and forward pass
+            prepared = await run_in_threadpool(service.prepare, [input_dict])
+            yield event("prediction", {"predicted_fuel_tons": round(float(prepared[1][0]), 2),
+                                       "model_version": service.model_version, "explanation_tier": tier})
+
+            if batcher is not None:
+                result = await batcher.submit((service, input_dict, attribution_mode, tier, timings, prepared))
+            else:
+                result = await run_in_threadpool(explain_timed, service, input_dict, attribution_mode, tier, timings, prepared)
+            log_prediction("/predict/stream", service, input_dict, attribution_mode, explanation, latency_budget_ms, result, started, timings)
+            yield event("explanation", {**result, "model_version": service.model_version,
+                                        "requested_tier": explanation, "degraded": tier != explanation})
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            yield event("error", {"detail": str(e)})
+        finally:
+            inflight_predictions -= 1
+
+    # X-Accel-Buffering stops nginx-style proxies from holding the first event back
+    return StreamingResponse(events(), media_type="application/x-ndjson",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.post("/predict/legs")
+def predict_fuel_legs(voyage: MultiLegVoyageInput, explain: bool = True, attribution_mode: str = "deeplift"):
+    service = explainer
+    if not service or not service.is_loaded:
+        raise HTTPException(status_code=503, detail="Model not loaded yet. backend might be training.")
+
+    if not voyage.legs:
+        raise HTTPException(status_code=400, detail="Voyage needs at least one leg")
+
+    if len(voyage.legs) > MAX_BATCH_ROWS:
+        raise HTTPException(status_code=413, detail=f"Voyage limited to {MAX_BATCH_ROWS} legs, got {len(voyage.legs)}")
+
+    if attribution_mode not in ATTRIBUTION_MODES:
+        raise HTTPException(status_code=400, detail=f"attribution_mode must be one of {list(ATTRIBUTION_MODES)}")
+
+    if explain and attribution_mode == "kernel" and len(voyage.legs) > MAX_SHAP_BATCH_ROWS:
+        raise HTTPException(status_code=400, detail=f"explain=true with kernel SHAP is limited to {MAX_SHAP_BATCH_ROWS} legs per voyage")
+
+    shared = voyage.dict(exclude={"legs"})
+    legs = [leg.dict() for leg in voyage.legs]
+    try:
+        return service.explain_legs(shared, legs, explain=explain, mode=attribution_mode)
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/predict/sweep")
+def predict_fuel_sweep(request: SweepInput):
+    service = explainer
+    if not service or not service.is_loaded:
+        raise HTTPException(status_code=503, detail="Model not loaded yet. backend might be training.")
+
+    if not 1 <= len(request.sweep) <= MAX_SWEEP_AXES:
+        raise HTTPException(status_code=400, detail=f"sweep takes 1 to {MAX_SWEEP_AXES} axes, got {len(request.sweep)}")
+
+    try:
+        result = service.sweep(request.base.dict(), [axis.dict() for axis in request.sweep],
+                               max_transit_hours=request.max_transit_hours)
+        # Already plain JSON types; skipping jsonable_encoder matters for 10k+ point grids
+        return JSONResponse(content=result)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/predict/batch")
+def predict_fuel_batch(batch: BatchPredictInput):
+    service = explainer
+    if not service or not service.is_loaded:
+        raise HTTPException(status_code=503, detail="Model not loaded yet. backend might be training.")
+
+    if len(batch.voyages) > MAX_BATCH_ROWS:
+        raise HTTPException(status_code=413, detail=f"Batch limited to {MAX_BATCH_ROWS} voyages, got {len(batch.voyages)}")
+
+    if batch.attribution_mode not in ATTRIBUTION_MODES:
+        raise HTTPException(status_code=400, detail=f"attribution_mode must be one of {list(ATTRIBUTION_MODES)}")
+
+    if batch.explain and batch.attribution_mode == "kernel" and len(batch.voyages) > service.max_kernel_rows:
+        raise HTTPException(status_code=400, detail=f"explain=true with kernel SHAP is limited to {service.max_kernel_rows} voyages per batch")
+
+    results = [None] * len(batch.voyages)
+    valid_rows = []
+    valid_indices = []
+    for index, row in enumerate(batch.voyages):
+        try:
+            valid_rows.append(VoyageInput(**row).dict())
+            valid_indices.append(index)
+        except ValidationError as e:
+            errors = [{"loc": list(err["loc"]), "msg": err["msg"]} for err in e.errors()]
+            results[index] = {"index": index, "error": errors}
+
+    try:
+        scored = service.explain_batch(valid_rows, explain=batch.explain, mode=batch.attribution_mode)
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
+
+    for index, result in zip(valid_indices, scored):
+        results[index] = {"index": index, **result}
+
+    return {
+        "count": len(results),
+        "scored": len(valid_rows),
+        "failed": len(results) - len(valid_rows),
+        "results": results
+    }
+
+KNOWN_PATHS = {route.path for route in app.routes}
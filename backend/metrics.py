@@ -0,0 +1,161 @@
+import threading
+import time
+from contextlib import nullcontext
+from contextvars import ContextVar
+
+# Upper bounds in seconds. Covers compiled predicts (~50us) up to full KernelExplainer runs.
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Per-request stage durations (seconds). The HTTP layer sets a dict here to build Server-Timing.
+request_timings = ContextVar("request_timings", default=None)
+
+_NULL_TIMER = nullcontext()
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.total += value
+        self.count += 1
+
+
+class _StageTimer:
+    __slots__ = ("registry", "name", "started")
+
+    def __init__(self, registry, name):
+        self.registry = registry
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.observe_stage(self.name, time.perf_counter() - self.started)
+        return False
+
+
+def _labels(**labels):
+    return ",".join(f'{key}="{value}"' for key, value in labels.items())
+
+
+class MetricsRegistry:
+    """
+    In-process stage histograms and request counters, rendered as Prometheus text.
+    When disabled, stage() returns a shared no-op context manager.
+    """
+
+    def __init__(self, enabled=True, buckets=DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self.stages = {}
+        self.request_durations = {}
+        self.requests = {}
+        self.errors = {}
+        # name -> [help text, count] for events the service counts itself
+        self.counters = {}
+
+    def stage(self, name):
+        if not self.enabled:
+            return _NULL_TIMER
+        return _StageTimer(self, name)
+
+    def observe_stage(self, name, seconds):
+        with self._lock:
+            histogram = self.stages.get(name)
+            if histogram is None:
+                histogram = self.stages[name] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+        timings = request_timings.get()
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + seconds
+
+    def observe_request(self, path, status, seconds):
+        with self._lock:
+            key = (path, str(status))
+            self.requests[key] = self.requests.get(key, 0) + 1
+            if status >= 500:
+                self.errors[path] = self.errors.get(path, 0) + 1
+
+            histogram = self.request_durations.get(path)
+            if histogram is None:
+                histogram = self.request_durations[path] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def count(self, name, help_text, amount=1):
+        """
+        Adds to a monotonic counter; `name` should end in _total.
+        """
+        with self._lock:
+            counter = self.counters.setdefault(name, [help_text, 0])
+            counter[1] += amount
+
+    def _histogram_lines(self, name, histograms, label):
+        lines = []
+        for key, histogram in sorted(histograms.items()):
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{_labels(**{label: key}, le=bound)}}} {cumulative}')
+            lines.append(f'{name}_bucket{{{_labels(**{label: key}, le="+Inf")}}} {histogram.count}')
+            lines.append(f'{name}_sum{{{_labels(**{label: key})}}} {histogram.total:.9f}')
+            lines.append(f'{name}_count{{{_labels(**{label: key})}}} {histogram.count}')
+        return lines
+
+    def render(self, gauges=None, counters=None):
+        """
+        Prometheus text exposition. `gauges` and `counters` are lists of (name, help, value)
+        added as-is; counter names should end in _total.
+        """
+        with self._lock:
+            lines = [
+                "# HELP vesselfuel_stage_duration_seconds Time spent in each ExplainerService stage.",
+                "# TYPE vesselfuel_stage_duration_seconds histogram",
+            ]
+            lines += self._histogram_lines("vesselfuel_stage_duration_seconds", self.stages, "stage")
+
+            lines += [
+                "# HELP vesselfuel_request_duration_seconds HTTP request latency by path.",
+                "# TYPE vesselfuel_request_duration_seconds histogram",
+            ]
+            lines += self._histogram_lines("vesselfuel_request_duration_seconds", self.request_durations, "path")
+
+            lines += [
+                "# HELP vesselfuel_requests_total HTTP requests by path and status.",
+                "# TYPE vesselfuel_requests_total counter",
+            ]
+            for (path, status), count in sorted(self.requests.items()):
+                lines.append(f'vesselfuel_requests_total{{{_labels(path=path, status=status)}}} {count}')
+
+            lines += [
+                "# HELP vesselfuel_request_errors_total HTTP requests that ended in a 5xx, by path.",
+                "# TYPE vesselfuel_request_errors_total counter",
+            ]
+            for path, count in sorted(self.errors.items()):
+                lines.append(f'vesselfuel_request_errors_total{{{_labels(path=path)}}} {count}')
+
+            for name, (help_text, count) in sorted(self.counters.items()):
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter", f"{name} {count}"]
+
+        for kind, series in (("gauge", gauges), ("counter", counters)):
+            for name, help_text, value in series or []:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.append(f"{name} {float(value)}")
+
+        return "\n".join(lines) + "\n"
+
+
+def server_timing_header(timings):
+    return ", ".join(f"{name};dur={seconds * 1000.0:.3f}" for name, seconds in timings.items())
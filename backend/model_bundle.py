@@ -0,0 +1,177 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+
+from fast_inference import CompiledPipeline
+
+# Bumped whenever the manifest layout changes incompatibly
+BUNDLE_FORMAT = 1
+
+MANIFEST_FILE = 'manifest.json'
+DEFAULT_BUNDLE_DIR = 'model_bundle'
+
+
+def _layer_file(member, kind, layer):
+    return f'member{member}_{kind}{layer}.npy'
+
+
+def save_bundle(bundle_dir, models, preprocessor, feature_columns, background=None, training_metrics=None):
+    """
+    Writes a self-contained model bundle: manifest.json (schema, vocabularies,
+    scaler statistics, architecture, metrics) plus one raw .npy file per weight
+    array, so serving can memory-map it instead of unpickling sklearn objects.
+
+    `models` is a fitted MLPRegressor or a list of them (a seed ensemble).
+    The directory is written next to the target and swapped in at the end, so
+    readers never see a half-written bundle. Returns the bundle version.
+    """
+    models = list(models) if isinstance(models, (list, tuple)) else [models]
+    # Validates the architecture and preprocessor exactly as serving will use them
+    pipeline = CompiledPipeline.from_sklearn(preprocessor, models)
+
+    arrays = {}
+    for k, (coefs, intercepts) in enumerate(pipeline.members):
+        for i, (W, b) in enumerate(zip(coefs, intercepts)):
+            arrays[_layer_file(k, 'W', i)] = W
+            arrays[_layer_file(k, 'b', i)] = b
+
+    background_info = None
+    if background is not None:
+        arrays['background.npy'] = np.asarray(background['data'], dtype=np.float64)
+        if background.get('weights') is not None:
+            arrays['background_weights.npy'] = np.asarray(background['weights'], dtype=np.float64)
+        background_info = {'method': background.get('method', 'unknown'), 'rows': int(len(background['data']))}
+
+    manifest = {
+        'format': BUNDLE_FORMAT,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'features': {
+            'input_columns': list(feature_columns),
+            'numerical': pipeline.numerical_cols,
+            'categorical': pipeline.categorical_cols
+        },
+        'scaler': {'mean': pipeline.mean.tolist(), 'scale': pipeline.scale.tolist()},
+        'categories': {col: [str(value) for value in values]
+                       for col, values in zip(pipeline.categorical_cols, pipeline.categories)},
+        'handle_unknown': pipeline.handle_unknown,
+        'model': {
+            'type': 'MLPRegressor',
+            'activation': 'relu',
+            'layer_sizes': [int(W.shape[1]) for W in pipeline.coefs],
+            'members': len(pipeline.members),
+            'dtype': str(pipeline.dtype)
+        },
+        'background': background_info,
+        'training_metrics': training_metrics or {},
+        'arrays': sorted(arrays)
+    }
+
+    # Content hash over the manifest and every array, like ExplainerService._artifact_version
+    digest = hashlib.sha256(json.dumps({key: value for key, value in manifest.items() if key != 'created'},
+                                       sort_keys=True).encode())
+    for name in manifest['arrays']:
+        digest.update(np.ascontiguousarray(arrays[name]).tobytes())
+    manifest['version'] = digest.hexdigest()[:12]
+
+    bundle_dir = os.path.abspath(bundle_dir)
+    staging = f'{bundle_dir}.tmp-{os.getpid()}'
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    for name, array in arrays.items():
+        np.save(os.path.join(staging, name), array)
+    with open(os.path.join(staging, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    # Processes that already mapped the old files keep them until they unmap
+    retired = f'{bundle_dir}.old-{os.getpid()}'
+    if os.path.exists(bundle_dir):
+        os.rename(bundle_dir, retired)
+    os.rename(staging, bundle_dir)
+    shutil.rmtree(retired, ignore_errors=True)
+
+    return manifest['version']
+
+
+class ModelBundle:
+    """
+    A loaded bundle. Weight arrays are read-only memory maps by default, so
+    every worker process serving the same bundle shares one copy in the page cache.
+    """
+
+    def __init__(self, path, mmap=True):
+        self.path = path
+        with open(os.path.join(path, MANIFEST_FILE)) as f:
+            self.manifest = json.load(f)
+
+        if self.manifest.get('format') != BUNDLE_FORMAT:
+            raise ValueError(f"Unsupported bundle format {self.manifest.get('format')}, expected {BUNDLE_FORMAT}")
+
+        self.version = self.manifest['version']
+        mmap_mode = 'r' if mmap else None
+
+        def load(name, mmap_mode=mmap_mode):
+            return np.load(os.path.join(path, name), mmap_mode=mmap_mode)
+
+        n_layers = len(self.manifest['model']['layer_sizes'])
+        self.members = [
+            ([load(_layer_file(k, 'W', i)) for i in range(n_layers)],
+             [load(_layer_file(k, 'b', i)) for i in range(n_layers)])
+            for k in range(self.manifest['model']['members'])
+        ]
+
+        # The background is a few rows and SHAP normalises its weights in place, so it is read into memory
+        arrays = set(self.manifest['arrays'])
+        self.background = load('background.npy', None) if 'background.npy' in arrays else None
+        self.background_weights = load('background_weights.npy', None) if 'background_weights.npy' in arrays else None
+
+    @property
+    def input_columns(self):
+        return self.manifest['features']['input_columns']
+
+    def pipeline(self):
+        features = self.manifest['features']
+        return CompiledPipeline(
+            features['numerical'], self.manifest['scaler']['mean'], self.manifest['scaler']['scale'],
+            features['categorical'], [self.manifest['categories'][col] for col in features['categorical']],
+            [coefs for coefs, _ in self.members], [intercepts for _, intercepts in self.members],
+            handle_unknown=self.manifest['handle_unknown'], dtype=self.manifest['model']['dtype']
+        )
+
+
+def load_bundle(path, mmap=True):
+    return ModelBundle(path, mmap=mmap)
+
+
+def is_bundle(path):
+    return bool(path) and os.path.isfile(os.path.join(path, MANIFEST_FILE))
+
+
+if __name__ == "__main__":
+    import argparse
+    import joblib
+
+    parser = argparse.ArgumentParser(description="Convert joblib artifacts into a memory-mappable model bundle")
+    parser.add_argument("--artifacts", default="backend", help="directory holding the .pkl artifacts")
+    parser.add_argument("--output", default=None, help=f"bundle directory (default <artifacts>/{DEFAULT_BUNDLE_DIR})")
+    args = parser.parse_args()
+
+    def artifact(name):
+        return os.path.join(args.artifacts, name)
+
+    model = joblib.load(artifact('maritime_model.pkl'))
+    if os.path.exists(artifact('maritime_ensemble.pkl')):
+        model = joblib.load(artifact('maritime_ensemble.pkl'))
+    background = joblib.load(artifact('shap_background.pkl')) if os.path.exists(artifact('shap_background.pkl')) else None
+
+    version = save_bundle(
+        args.output or artifact(DEFAULT_BUNDLE_DIR),
+        model,
+        joblib.load(artifact('preprocessor.pkl')),
+        joblib.load(artifact('feature_names.pkl')),
+        background
+    )
+    print(f"Bundle {version} written to {args.output or artifact(DEFAULT_BUNDLE_DIR)}")
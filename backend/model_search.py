@@ -0,0 +1,166 @@
+import itertools
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+from sklearn.metrics import mean_absolute_error
+from sklearn.model_selection import train_test_split
+from sklearn.neural_network import MLPRegressor
+
+from train_model import load_training_matrix, build_background_summary, save_artifacts
+from worker_pool import process_pool
+
+# Hyperparameters explored by the search; everything else matches train_model
+SEARCH_SPACE = {
+    'hidden_layer_sizes': [(64, 32, 16), (128, 64, 32), (64, 64), (32, 16)],
+    'learning_rate_init': [0.001, 0.003, 0.01],
+    'alpha': [0.0001, 0.001, 0.01]
+}
+
+# Memory-mapped views of the shared matrices, opened once per worker by _init_worker
+_shared = {}
+
+
+def candidate_grid(space=SEARCH_SPACE):
+    keys = list(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*(space[key] for key in keys))]
+
+
+def candidate_random(n_iter, space=SEARCH_SPACE, random_state=42):
+    rng = np.random.default_rng(random_state)
+    grid = candidate_grid(space)
+    picks = rng.choice(len(grid), size=min(n_iter, len(grid)), replace=False)
+    return [grid[i] for i in picks]
+
+
+def _share_arrays(workdir, **arrays):
+    """
+    Writes the arrays once as .npy so workers memory-map them instead of
+    receiving a pickled copy each.
+    """
+    paths = {}
+    for name, array in arrays.items():
+        paths[name] = os.path.join(workdir, f'{name}.npy')
+        np.save(paths[name], np.ascontiguousarray(array))
+    return paths
+
+
+def _init_worker(paths):
+    for name, path in paths.items():
+        _shared[name] = np.load(path, mmap_mode='r')
+
+
+def _build_model(params, random_state, max_iter):
+    return MLPRegressor(
+        activation='relu',
+        solver='adam',
+        max_iter=max_iter,
+        random_state=random_state,
+        **params
+    )
+
+
+def _evaluate(params, random_state, max_iter):
+    started = time.perf_counter()
+    model = _build_model(params, random_state, max_iter)
+    model.fit(_shared['X_train'], _shared['y_train'])
+    mae = mean_absolute_error(_shared['y_val'], model.predict(_shared['X_val']))
+    return {
+        'params': {**params, 'hidden_layer_sizes': list(params['hidden_layer_sizes'])},
+        'random_state': random_state,
+        'val_mae': float(mae),
+        'fit_seconds': round(time.perf_counter() - started, 3),
+        'model': model
+    }
+
+
+def search(data_path='fuel_consumption_data.csv', output_dir='backend', strategy='random', n_iter=12,
+           ensemble_size=1, workers=None, max_iter=500, random_state=42, cache_dir=None):
+    """
+    Parallel hyperparameter search over a process pool. Candidates are ranked by
+    validation MAE; the winner is retrained with `ensemble_size` seeds and saved
+    with the usual artifacts (plus maritime_ensemble.pkl when ensemble_size > 1).
+    """
+    workers = workers or os.cpu_count()
+
+    print("Loading data...")
+    X_processed, y, ship_types, feature_columns, _, preprocessor = load_training_matrix(data_path, cache_dir)
+    X_train, X_val, y_train, y_val, ship_train, _ = train_test_split(
+        X_processed, y, ship_types, test_size=0.2, random_state=random_state
+    )
+
+    candidates = candidate_grid() if strategy == 'grid' else candidate_random(n_iter, random_state=random_state)
+    print(f"Searching {len(candidates)} candidates on {workers} workers...")
+
+    with tempfile.TemporaryDirectory(prefix='vesselfuel-search-') as workdir:
+        paths = _share_arrays(workdir, X_train=X_train, y_train=y_train, X_val=X_val, y_val=y_val)
+
+        started = time.perf_counter()
+        with process_pool(workers, _init_worker, (paths,)) as pool:
+            futures = [pool.submit(_evaluate, params, random_state, max_iter) for params in candidates]
+            results = [future.result() for future in futures]
+            search_seconds = time.perf_counter() - started
+
+            results.sort(key=lambda result: result['val_mae'])
+            for rank, result in enumerate(results, 1):
+                print(f"  #{rank:<3} MAE {result['val_mae']:8.2f}  {result['params']}  ({result['fit_seconds']}s)")
+
+            best = results[0]
+            best_params = {**best['params'], 'hidden_layer_sizes': tuple(best['params']['hidden_layer_sizes'])}
+
+            members = [best]
+            if ensemble_size > 1:
+                print(f"Training {ensemble_size}-member seed ensemble...")
+                seeds = [random_state + i for i in range(1, ensemble_size)]
+                futures = [pool.submit(_evaluate, best_params, seed, max_iter) for seed in seeds]
+                members += [future.result() for future in futures]
+
+    total_fit = sum(result['fit_seconds'] for result in results)
+    print(f"Search wall time {search_seconds:.1f}s for {total_fit:.1f}s of fitting "
+          f"({total_fit / search_seconds:.1f}x parallel speed-up)")
+
+    models = [member['model'] for member in members]
+    ensemble_mae = None
+    if len(models) > 1:
+        ensemble_pred = np.mean([model.predict(X_val) for model in models], axis=0)
+        ensemble_mae = float(mean_absolute_error(y_val, ensemble_pred))
+        print(f"Best single MAE {best['val_mae']:.2f} tons, {len(models)}-member ensemble MAE {ensemble_mae:.2f} tons")
+
+    background = build_background_summary(X_train, ship_train)
+    training_metrics = {'val_mae': best['val_mae'], 'ensemble_val_mae': ensemble_mae,
+                        'train_rows': len(X_train), 'val_rows': len(X_val)}
+    save_artifacts(output_dir, models[0], preprocessor, feature_columns, background,
+                   members=models, training_metrics=training_metrics)
+
+    report = {
+        'strategy': strategy,
+        'workers': workers,
+        'search_seconds': round(search_seconds, 3),
+        'best': {key: value for key, value in best.items() if key != 'model'},
+        'ensemble_size': len(models),
+        'ensemble_val_mae': ensemble_mae,
+        'candidates': [{key: value for key, value in result.items() if key != 'model'} for result in results]
+    }
+    with open(os.path.join(output_dir, 'search_results.json'), 'w') as f:
+        json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Parallel hyperparameter search and seed-ensemble training")
+    parser.add_argument("--data", default="fuel_consumption_data.csv")
+    parser.add_argument("--output-dir", default="backend")
+    parser.add_argument("--strategy", choices=["grid", "random"], default="random")
+    parser.add_argument("--n-iter", type=int, default=12, help="candidates for random search")
+    parser.add_argument("--ensemble", type=int, default=1, help="seed-ensemble size for the winning configuration")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--max-iter", type=int, default=500)
+    parser.add_argument("--cache-dir", default=None, help="reuse the preprocessed matrix from this dataset cache")
+    args = parser.parse_args()
+
+    search(data_path=args.data, output_dir=args.output_dir, strategy=args.strategy, n_iter=args.n_iter,
+           ensemble_size=args.ensemble, workers=args.workers, max_iter=args.max_iter, cache_dir=args.cache_dir)
@@ -0,0 +1,128 @@
+import os
+from multiprocessing import get_context, shared_memory
+
+import numpy as np
+
+from worker_pool import process_pool
+
+# Each row is explained on its own with np.random seeded from seed + row index, so a row's
+# values do not depend on which worker got it or how the batch was split
+DEFAULT_SEED = 0
+
+# Chunks submitted per worker; more chunks even out slow rows at a small pickling cost
+CHUNKS_PER_WORKER = 4
+
+# This worker's shared-memory mapping and KernelExplainer, built once by _init_worker
+_worker = {}
+
+
+def _predict_function(predictor):
+    if hasattr(predictor, 'predict_matrix'):
+        return predictor.predict_matrix
+    # A list of sklearn members, averaged like ExplainerService._predict_processed
+    return lambda X: np.mean([member.predict(X) for member in predictor], axis=0)
+
+
+def _init_worker(shm_name, shape, dtype, weights, predictor):
+    import shap
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    background = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    data = background
+    if weights is not None:
+        # Same weighted summary as ExplainerService._ensure_explainer. SHAP normalises
+        # the weights in place, so they are a private copy rather than shared
+        from shap.utils._legacy import DenseData
+        data = DenseData(background, [str(i) for i in range(shape[1])], None, np.array(weights, dtype=float))
+
+    # The mapping has to outlive the explainer that reads from it
+    _worker['shm'] = shm
+    _worker['explainer'] = shap.KernelExplainer(_predict_function(predictor), data)
+
+
+def explain_rows(explainer, rows, nsamples='auto', seed=DEFAULT_SEED, start=0):
+    """
+    SHAP values for each row of `rows`, explained one at a time with np.random seeded
+    from seed + start + row index. ExplainerService uses this in-process too, so a row
+    gets the same values whether or not it went through the pool.
+    """
+    values = np.empty(rows.shape, dtype=np.float64)
+    for i, row in enumerate(rows):
+        np.random.seed(seed + start + i)
+        row_values = explainer.shap_values(row[np.newaxis, :], nsamples=nsamples, silent=True)
+        if isinstance(row_values, list):
+            row_values = row_values[0]
+        values[i] = np.asarray(row_values).reshape(-1)
+    return values
+
+
+def _explain_chunk(start, rows, nsamples, seed):
+    explainer = _worker['explainer']
+    return start, explain_rows(explainer, rows, nsamples, seed, start), float(np.ravel(explainer.expected_value)[0])
+
+
+class ParallelKernelExplainer:
+    """
+    KernelExplainer spread over a persistent process pool. The background summary is
+    written once to shared memory; every worker maps it and builds its explainer once.
+    `predictor` is a CompiledPipeline or a list of fitted sklearn members.
+
+    Workers are spawned rather than forked, because the API server that owns the pool
+    runs threads. Call close() to stop the workers and release the shared block.
+    """
+
+    def __init__(self, predictor, background, background_weights=None, workers=None, seed=DEFAULT_SEED):
+        self.workers = workers or os.cpu_count() or 1
+        self.seed = seed
+        # A forked child sees this object but cannot use the executor or own the shared block
+        self._owner_pid = os.getpid()
+
+        background = np.ascontiguousarray(background, dtype=np.float64)
+        self._shm = shared_memory.SharedMemory(create=True, size=max(background.nbytes, 1))
+        np.ndarray(background.shape, dtype=background.dtype, buffer=self._shm.buf)[:] = background
+
+        weights = None if background_weights is None else np.asarray(background_weights, dtype=float).tolist()
+        self._pool = process_pool(
+            self.workers,
+            _init_worker,
+            (self._shm.name, background.shape, background.dtype.str, weights, predictor),
+            mp_context=get_context('spawn')
+        )
+
+    def shap_values(self, X, nsamples='auto'):
+        """
+        Returns (values, expected_value): one row of SHAP values per row of the processed
+        matrix X, in input order.
+        """
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        chunk = max(1, -(-len(X) // (self.workers * CHUNKS_PER_WORKER)))
+        futures = [self._pool.submit(_explain_chunk, start, X[start:start + chunk], nsamples, self.seed)
+                   for start in range(0, len(X), chunk)]
+
+        values = np.empty(X.shape, dtype=np.float64)
+        expected_value = None
+        for future in futures:
+            start, chunk_values, expected_value = future.result()
+            values[start:start + len(chunk_values)] = chunk_values
+        return values, expected_value
+
+    def warm_up(self, rows):
+        """
+        Starts every worker and builds its explainer, using `rows` as throwaway input.
+        """
+        rows = np.asarray(rows)
+        sample = rows[np.arange(self.workers * CHUNKS_PER_WORKER) % len(rows)]
+        self.shap_values(sample, nsamples=8)
+
+    @property
+    def owned(self):
+        return os.getpid() == self._owner_pid
+
+    def close(self):
+        if not self.owned:
+            # Inherited copy: the creating process shuts the workers down and unlinks the block
+            return
+        # Chunks already submitted still run, so callers in flight get their results
+        self._pool.shutdown(wait=True)
+        self._shm.close()
+        self._shm.unlink()
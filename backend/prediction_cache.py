@@ -0,0 +1,104 @@
+import copy
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+def parse_precision(spec):
+    """
+    Parses "Wave_Height_m=1,Avg_Speed_Knots=0" into {'Wave_Height_m': 1, 'Avg_Speed_Knots': 0}.
+    """
+    precision = {}
+    for item in (spec or "").split(","):
+        if not item.strip():
+            continue
+        field, digits = item.split("=")
+        precision[field.strip()] = int(digits)
+    return precision
+
+
+class PredictionCache:
+    """
+    Bounded LRU + TTL cache for prediction/explanation results.
+    Keys are a hash of the canonicalized input dict plus the model version,
+    so entries from an older model can never be served after a reload.
+    """
+
+    def __init__(self, max_entries=1024, ttl_seconds=300.0, precision=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # Field -> decimal places. Snapping lets near-duplicate inputs share an entry.
+        self.precision = dict(precision or {})
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def canonicalize(self, input_data):
+        canonical = {}
+        for field, value in input_data.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                value = float(value)
+                if field in self.precision:
+                    value = round(value, self.precision[field]) + 0.0  # + 0.0 folds -0.0 into 0.0
+            canonical[field] = value
+        return canonical
+
+    def make_key(self, input_data, model_version, *extra):
+        payload = json.dumps(
+            [model_version, list(extra), self.canonicalize(input_data)],
+            sort_keys=True, separators=(",", ":"), default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return copy.deepcopy(value)
+
+    def put(self, key, value):
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "precision": self.precision,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
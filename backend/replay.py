@@ -0,0 +1,222 @@
+"""
+Replays a request log (see request_log.py) as a load test.
+
+Requests are sent at the times they were recorded, compressed or stretched by
+--speed, so bursts and idle gaps in real traffic are kept. --speed 0 ignores the
+timestamps and sends as fast as --concurrency allows. The target is a running
+server, or an ExplainerService loaded in this process:
+
+    python backend/replay.py --log request-logs/ --url http://127.0.0.1:8000 --speed 2
+    python backend/replay.py --log request-logs/ --artifact-dir backend --speed 0 --concurrency 4
+
+Latency is measured from each request's scheduled send time, so a target that falls
+behind shows up in the percentiles instead of silently lowering the offered rate.
+"""
+import argparse
+import json
+import math
+import os
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from request_log import iter_records
+
+INPUT_PREFIX = "input."
+
+
+def _present(value):
+    # Columns absent from a request read back as NaN (numbers) or None (strings)
+    return value is not None and not (isinstance(value, float) and math.isnan(value))
+
+
+def load_requests(path, limit=None):
+    """
+    Recorded requests sorted by time, as dicts with `offset` (seconds since the first
+    request), `path`, `mode`, `tier`, `budget_ms`, `input` and the recorded `latency_ms`.
+    """
+    requests = []
+    for record in iter_records(path):
+        requests.append({
+            "ts": record["ts"],
+            "path": record.get("path") or "/predict",
+            "mode": record.get("attribution_mode") or "kernel",
+            "tier": record.get("requested_tier") or "full",
+            "budget_ms": record["latency_budget_ms"] if _present(record.get("latency_budget_ms")) else None,
+            "input": {name[len(INPUT_PREFIX):]: value for name, value in record.items()
+                      if name.startswith(INPUT_PREFIX) and _present(value)},
+            "latency_ms": record.get("latency_ms")
+        })
+
+    # Workers write separate files, so their requests interleave
+    requests.sort(key=lambda request: request["ts"])
+    if limit:
+        requests = requests[:limit]
+    if requests:
+        first = requests[0]["ts"]
+        for request in requests:
+            request["offset"] = request["ts"] - first
+    return requests
+
+
+def http_target(url, timeout=60.0):
+    """
+    Sends each request to a running server. Returns (ok, status).
+    """
+    base = url.rstrip("/")
+
+    def send(request):
+        query = {"attribution_mode": request["mode"], "explanation": request["tier"]}
+        if request["budget_ms"] is not None:
+            query["latency_budget_ms"] = request["budget_ms"]
+        http_request = urllib.request.Request(
+            f"{base}{request['path']}?{urllib.parse.urlencode(query)}",
+            data=json.dumps(request["input"]).encode(),
+            headers={"Content-Type": "application/json"},
+            method="POST"
+        )
+        try:
+            with urllib.request.urlopen(http_request, timeout=timeout) as response:
+                # Read the whole body: a streamed response is only done after its last event
+                body = response.read()
+        except urllib.error.HTTPError as e:
+            return False, e.code
+        except (urllib.error.URLError, OSError) as e:
+            return False, type(e).__name__
+        if request["path"].endswith("/stream") and b'"event": "error"' in body:
+            return False, "stream_error"
+        return True, response.status
+
+    return send
+
+
+def service_target(artifact_dir):
+    """
+    Scores each request in-process, the way /predict would without overload degradation.
+    """
+    from explainability import ExplainerService, service_paths
+
+    service = ExplainerService(**service_paths(artifact_dir))
+    if not service.is_loaded:
+        raise ValueError(f"No model artifacts found in {artifact_dir}")
+
+    def send(request):
+        try:
+            tier = service.choose_tier(request["tier"], request["budget_ms"], 0, request["mode"])
+            service.explain(request["input"], mode=request["mode"], tier=tier)
+        except Exception as e:
+            return False, type(e).__name__
+        return True, 200
+
+    return send
+
+
+def replay(requests, send, speed=1.0, concurrency=32):
+    """
+    Sends `requests` through `send` and returns the report. speed=1 keeps the recorded
+    rate, 2 doubles it, 0 sends back to back.
+    """
+    if speed < 0:
+        raise ValueError("speed must be non-negative (0 sends without pauses)")
+
+    latencies, lags, statuses = [], [], {}
+    lock = threading.Lock()
+
+    def run(request, scheduled):
+        started = time.perf_counter()
+        ok, status = send(request)
+        finished = time.perf_counter()
+        with lock:
+            # Open loop: time waiting for a free slot counts against the target
+            latencies.append((finished - (scheduled if scheduled is not None else started)) * 1000.0)
+            if scheduled is not None:
+                lags.append((started - scheduled) * 1000.0)
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+        return ok
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = []
+        for request in requests:
+            scheduled = None
+            if speed > 0:
+                scheduled = started + request["offset"] / speed
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            futures.append(pool.submit(run, request, scheduled))
+        ok = sum(future.result() for future in futures)
+    elapsed = time.perf_counter() - started
+
+    span = requests[-1]["offset"] if requests else 0.0
+    report = {
+        "requests": len(requests),
+        "ok": ok,
+        "errors": len(requests) - ok,
+        "statuses": statuses,
+        "speed": speed,
+        "concurrency": concurrency,
+        "recorded_span_s": round(span, 3),
+        "recorded_rate_rps": round(len(requests) / span, 3) if span else None,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(requests) / elapsed, 3) if elapsed else None,
+        "latency_ms": summarize(latencies),
+        "recorded_latency_ms": summarize([r["latency_ms"] for r in requests if _present(r["latency_ms"])]),
+    }
+    if lags:
+        report["schedule_lag_ms"] = summarize(lags)
+    return report
+
+
+def summarize(samples_ms):
+    if not samples_ms:
+        return None
+    samples = np.asarray(samples_ms, dtype=float)
+    return {
+        "p50": round(float(np.percentile(samples, 50)), 3),
+        "p95": round(float(np.percentile(samples, 95)), 3),
+        "p99": round(float(np.percentile(samples, 99)), 3),
+        "max": round(float(samples.max()), 3),
+        "mean": round(float(samples.mean()), 3)
+    }
+
+
+def print_report(report):
+    print(f"Replayed {report['requests']:,} requests in {report['elapsed_s']:.1f}s "
+          f"({report['throughput_rps']} req/s, recorded {report['recorded_rate_rps']} req/s, speed {report['speed']})")
+    print(f"  ok {report['ok']:,}  errors {report['errors']:,}  statuses {report['statuses']}")
+    for name in ("latency_ms", "recorded_latency_ms", "schedule_lag_ms"):
+        stats = report.get(name)
+        if stats:
+            print(f"  {name:<20} " + "  ".join(f"{stat} {value:.1f}" for stat, value in stats.items()))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a request log against a server or an in-process ExplainerService")
+    parser.add_argument("--log", required=True, help="log file, or the VESSELFUEL_REQUEST_LOG_DIR directory")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--url", help="base URL of a running server, e.g. http://127.0.0.1:8000")
+    target.add_argument("--artifact-dir", help="score in-process with the model_bundle/ or .pkl artifacts here")
+    parser.add_argument("--speed", type=float, default=1.0, help="multiple of the recorded rate; 0 sends back to back")
+    parser.add_argument("--concurrency", type=int, default=32, help="requests in flight at most")
+    parser.add_argument("--limit", type=int, default=None, help="replay only the first N requests")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-request HTTP timeout in seconds")
+    parser.add_argument("--output", default=None, help="also write the report as JSON")
+    args = parser.parse_args()
+
+    requests = load_requests(args.log, limit=args.limit)
+    if not requests:
+        raise SystemExit(f"No requests found in {args.log}")
+    send = http_target(args.url, args.timeout) if args.url else service_target(args.artifact_dir)
+
+    report = replay(requests, send, speed=args.speed, concurrency=args.concurrency)
+    print_report(report)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,226 @@
+import glob
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import deque
+
+import numpy as np
+
+# Append-only, columnar request log.
+#
+# A file is a sequence of self-describing blocks, one per flush:
+#   MAGIC | uint32 header length | uint32 body length | JSON header | zlib body
+# The header lists the block's columns (name, dtype, byte size, and for strings the
+# dictionary their codes index into); the body is the column buffers back to back.
+# A crash can only leave a truncated last block, which readers skip.
+MAGIC = b'VFL1'
+_SIZES = struct.Struct('<II')
+
+LOG_SUFFIX = '.vflog'
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def _encode_column(values):
+    """
+    (array, dictionary) for one column. Numbers become int64 or float64 (None as NaN),
+    anything else is dictionary-encoded into the smallest unsigned code type.
+    """
+    def is_number(value, types=(int, float, np.integer, np.floating)):
+        return isinstance(value, types) and not isinstance(value, bool)
+
+    if all(is_number(value, (int, np.integer)) for value in values):
+        return np.asarray(values, dtype=np.int64), None
+    if all(value is None or is_number(value) for value in values):
+        return np.asarray([np.nan if value is None else value for value in values], dtype=np.float64), None
+
+    dictionary = {}
+    codes = [dictionary.setdefault(None if value is None else str(value), len(dictionary)) for value in values]
+    dtype = np.uint8 if len(dictionary) <= 0xFF else np.uint16 if len(dictionary) <= 0xFFFF else np.uint32
+    return np.asarray(codes, dtype=dtype), list(dictionary)
+
+
+def encode_block(records):
+    names = []
+    for record in records:
+        for name in record:
+            if name not in names:
+                names.append(name)
+
+    columns, buffers = [], []
+    for name in names:
+        array, dictionary = _encode_column([record.get(name) for record in records])
+        column = {'name': name, 'dtype': array.dtype.str, 'size': array.nbytes}
+        if dictionary is not None:
+            column['dictionary'] = dictionary
+        columns.append(column)
+        buffers.append(array.tobytes())
+
+    header = json.dumps({'rows': len(records), 'columns': columns, 'compression': 'zlib'}, separators=(',', ':')).encode()
+    body = zlib.compress(b''.join(buffers), 1)
+    return MAGIC + _SIZES.pack(len(header), len(body)) + header + body
+
+
+def iter_blocks(path):
+    """
+    Yields (rows, {name: array or list of strings}) per block of one log file.
+    """
+    with open(path, 'rb') as f:
+        while True:
+            prefix = f.read(len(MAGIC) + _SIZES.size)
+            if len(prefix) < len(MAGIC) + _SIZES.size or prefix[:len(MAGIC)] != MAGIC:
+                return
+            header_len, body_len = _SIZES.unpack(prefix[len(MAGIC):])
+            header_bytes, body = f.read(header_len), f.read(body_len)
+            if len(header_bytes) < header_len or len(body) < body_len:
+                return
+            header = json.loads(header_bytes)
+            body = zlib.decompress(body) if header.get('compression') == 'zlib' else body
+
+            columns, offset = {}, 0
+            for column in header['columns']:
+                array = np.frombuffer(body, dtype=column['dtype'], count=column['size'] // np.dtype(column['dtype']).itemsize,
+                                      offset=offset)
+                offset += column['size']
+                if 'dictionary' in column:
+                    dictionary = column['dictionary']
+                    columns[column['name']] = [dictionary[code] for code in array]
+                else:
+                    columns[column['name']] = array
+            yield header['rows'], columns
+
+
+def log_files(path):
+    """
+    A single log file, or every log file in a directory in the order they were written.
+    """
+    if os.path.isdir(path):
+        return sorted(glob.glob(os.path.join(path, f'*{LOG_SUFFIX}')), key=os.path.getmtime)
+    return [path]
+
+
+def iter_records(path):
+    """
+    Yields one dict per logged request. Floats are read back as Python floats, with
+    NaN meaning the field was absent for that request.
+    """
+    for file_path in log_files(path):
+        for rows, columns in iter_blocks(file_path):
+            for i in range(rows):
+                yield {name: (values[i] if isinstance(values, list) else values[i].item())
+                       for name, values in columns.items()}
+
+
+class RequestLogger:
+    """
+    Non-blocking writer for the request log. log() only appends to an in-memory buffer;
+    a background thread encodes and writes it every `flush_interval` seconds (or once
+    `flush_rows` are waiting) and starts a new file past `max_bytes`. When more than
+    `max_pending` records are waiting the newest are dropped and counted, never blocking
+    the caller. Only the newest `max_files` files are kept (0 keeps all).
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES, max_files=0, flush_interval=1.0,
+                 flush_rows=4096, max_pending=100_000, prefix='requests'):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.flush_interval = flush_interval
+        self.flush_rows = flush_rows
+        self.max_pending = max_pending
+        # Workers of one server share the directory; the pid keeps their files apart
+        self.prefix = f'{prefix}-{os.getpid()}'
+
+        self.logged = 0
+        self.dropped = 0
+        self.written_blocks = 0
+        self.write_errors = 0
+
+        self._pending = deque()
+        self._wake = threading.Event()
+        self._closed = False
+        self._file = None
+        self._sequence = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name='request-log', daemon=True)
+        self._thread.start()
+
+    def log(self, record):
+        if self._closed or len(self._pending) >= self.max_pending:
+            self.dropped += 1
+            return
+        # deque.append is atomic, so no lock on the request path
+        self._pending.append(record)
+        self.logged += 1
+        if len(self._pending) >= self.flush_rows:
+            self._wake.set()
+
+    def stats(self):
+        return {
+            "directory": self.directory,
+            "logged": self.logged,
+            "dropped": self.dropped,
+            "pending": len(self._pending),
+            "written_blocks": self.written_blocks,
+            "write_errors": self.write_errors,
+            "current_file": self._file.name if self._file else None
+        }
+
+    def close(self):
+        """
+        Writes everything still buffered and stops the flush thread.
+        """
+        self._closed = True
+        self._wake.set()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            closing = self._closed
+            self._flush()
+            if closing:
+                while self._pending:
+                    self._flush()
+                break
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _flush(self):
+        records = []
+        while self._pending and len(records) < self.flush_rows * 4:
+            records.append(self._pending.popleft())
+        if not records:
+            return
+
+        try:
+            block = encode_block(records)
+            if self._file is None or (self._file.tell() and self._file.tell() + len(block) > self.max_bytes):
+                self._rotate()
+            self._file.write(block)
+            self._file.flush()
+            self.written_blocks += 1
+        except Exception as e:
+            self.write_errors += 1
+            print(f"Request log write failed, {len(records)} records lost: {e}")
+
+        # Keep up with a backlog rather than waiting another interval
+        if len(self._pending) >= self.flush_rows:
+            self._wake.set()
+
+    def _rotate(self):
+        if self._file is not None:
+            self._file.close()
+        name = f"{self.prefix}-{time.strftime('%Y%m%d-%H%M%S')}-{self._sequence:04d}{LOG_SUFFIX}"
+        self._sequence += 1
+        self._file = open(os.path.join(self.directory, name), 'ab')
+
+        if self.max_files:
+            own = sorted(glob.glob(os.path.join(self.directory, f'{self.prefix}-*{LOG_SUFFIX}')), key=os.path.getmtime)
+            for stale in own[:-self.max_files]:
+                os.remove(stale)
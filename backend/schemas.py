@@ -0,0 +1,138 @@
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError, model_validator
+from typing import Any, Dict, List, Optional
+from explainability import MAX_SWEEP_POINTS
+
+# Input Schema
+class VoyageInput(BaseModel):
+    # 1. Vessel
+    Ship_Type: str
+    DWT: float
+    GT: float
+    LOA: float
+    Beam: float
+    Design_Speed: float
+    Draft_Percentage: float
+    Hull_Fouling: str
+
+    # 2. Propulsion
+    Main_Engine_Type: str
+    Engine_Power_kW: float
+    SFOC_g_kWh: float
+    Propeller_Type: str
+
+    # 3. Voyage
+    Distance_NM: float
+    Avg_Speed_Knots: float
+    Speed_Profile: str
+
+    # 4. Environment
+    Season: str
+    Wind_Beaufort: int
+    Wind_Direction: str
+    Wave_Height_m: float
+    Current_Speed_Knots: float
+    Current_Direction: str
+
+    # 5. Fuel & Ops
+    Fuel_Type: str
+    Weather_Routing_Efficiency: float
+
+# Multi-leg Schema
+# Vessel, propulsion and fuel fields are given once; each leg has its own voyage and environment fields
+class LegInput(BaseModel):
+    # 3. Voyage
+    Distance_NM: float
+    Avg_Speed_Knots: float
+    Speed_Profile: str
+
+    # 4. Environment
+    Season: str
+    Wind_Beaufort: int
+    Wind_Direction: str
+    Wave_Height_m: float
+    Current_Speed_Knots: float
+    Current_Direction: str
+
+class MultiLegVoyageInput(BaseModel):
+    # 1. Vessel
+    Ship_Type: str
+    DWT: float
+    GT: float
+    LOA: float
+    Beam: float
+    Design_Speed: float
+    Draft_Percentage: float
+    Hull_Fouling: str
+
+    # 2. Propulsion
+    Main_Engine_Type: str
+    Engine_Power_kW: float
+    SFOC_g_kWh: float
+    Propeller_Type: str
+
+    # 5. Fuel & Ops
+    Fuel_Type: str
+    Weather_Routing_Efficiency: float
+
+    legs: List[LegInput]
+
+# Batch Schema
+# Rows are validated one by one so a bad voyage does not reject the whole batch
+class BatchPredictInput(BaseModel):
+    voyages: List[Dict[str, Any]]
+    explain: bool = False
+    attribution_mode: str = "kernel"
+
+# Sweep Schema
+# Each axis gives explicit `values`, or `num` points from `start` to `stop` inclusive.
+# Sizes are capped here, before any grid is built.
+class SweepAxis(BaseModel):
+    field: str
+    values: Optional[List[Any]] = Field(None, min_length=1, max_length=MAX_SWEEP_POINTS)
+    start: Optional[float] = None
+    stop: Optional[float] = None
+    num: Optional[int] = Field(None, ge=1, le=MAX_SWEEP_POINTS)
+
+class SweepInput(BaseModel):
+    base: VoyageInput
+    sweep: List[SweepAxis]
+    max_transit_hours: Optional[float] = None
+
+    @model_validator(mode='after')
+    def check_axes(self):
+        """
+        Swept values must be valid for their VoyageInput field, and the whole grid must fit.
+        Explicit values are replaced by their validated form (e.g. 2.0 -> 2 for an int field).
+        """
+        n_points = 1
+        for axis in self.sweep:
+            field = VoyageInput.model_fields.get(axis.field)
+            if field is None:
+                raise ValueError(f"Unknown sweep field '{axis.field}'")
+
+            if axis.values is not None:
+                try:
+                    axis.values = TypeAdapter(List[field.annotation]).validate_python(axis.values)
+                except ValidationError as e:
+                    raise ValueError(f"Invalid values for {axis.field}: {e.errors()[0]['msg']}")
+                n_points *= len(axis.values)
+            elif None not in (axis.start, axis.stop, axis.num):
+                if field.annotation is str:
+                    raise ValueError(f"{axis.field} is categorical; sweep it with 'values'")
+                if field.annotation is int and not _integer_range(axis.start, axis.stop, axis.num):
+                    raise ValueError(f"{axis.field} takes integers; start, stop and num must give whole-number steps")
+                n_points *= axis.num
+            else:
+                raise ValueError(f"Sweep over {axis.field} needs 'values' or 'start', 'stop' and 'num'")
+
+        if n_points > MAX_SWEEP_POINTS:
+            raise ValueError(f"Sweep limited to {MAX_SWEEP_POINTS} points, got {n_points}")
+        return self
+
+def _integer_range(start, stop, num):
+    if not (float(start).is_integer() and float(stop).is_integer()):
+        return False
+    return num == 1 or (stop - start) % (num - 1) == 0
+
+class ReloadInput(BaseModel):
+    bundle_path: Optional[str] = None
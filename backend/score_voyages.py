@@ -0,0 +1,311 @@
+"""
+Offline batch scoring.
+
+Streams a CSV or Parquet file of voyages in chunks, validates each row against
+the VoyageInput schema and scores the chunks across a process pool. Results are
+written in input order, to a CSV file or to a directory of Parquet part files.
+A checkpoint after every written chunk lets an interrupted run continue with --resume:
+
+    python backend/score_voyages.py --input voyages.parquet --output scored.csv --workers 8
+    python backend/score_voyages.py --input voyages.parquet --output scored.csv --workers 8 --resume
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from explainability import ExplainerService, GRADIENT_MODES, service_paths
+from schemas import VoyageInput
+from worker_pool import process_pool
+
+DEFAULT_CHUNK_SIZE = 50_000
+
+# This worker's ExplainerService, loaded once by _init_worker
+_service = None
+
+
+def schema_fields():
+    """
+    (name, type) for every VoyageInput field, in schema order.
+    """
+    return [(name, field.annotation) for name, field in VoyageInput.model_fields.items()]
+
+
+def validate_frame(frame):
+    """
+    Vectorized equivalent of VoyageInput(**row) for a whole chunk. Returns the
+    coerced frame and a Series holding an error message for each invalid row, or None.
+    Missing columns are not a per-row problem and raise ValueError.
+    """
+    fields = schema_fields()
+    missing = [name for name, _ in fields if name not in frame.columns]
+    if missing:
+        raise ValueError(f"Input is missing VoyageInput columns: {missing}")
+
+    clean = pd.DataFrame(index=frame.index)
+    problems = []
+    for name, annotation in fields:
+        column = frame[name]
+        if annotation is str:
+            bad = column.isna()
+            clean[name] = column.astype(str)
+            message = f"{name}: missing"
+        else:
+            values = pd.to_numeric(column, errors='coerce')
+            bad = values.isna() | ~np.isfinite(values.fillna(0))
+            message = f"{name}: not a number"
+            if annotation is int:
+                fractional = values.notna() & (values % 1 != 0)
+                bad |= fractional
+                message = f"{name}: not an integer"
+            clean[name] = values
+        if bad.any():
+            problems.append(np.where(bad, message, None))
+
+    errors = pd.Series(None, index=frame.index, dtype=object)
+    if problems:
+        stacked = np.stack(problems, axis=1)
+        for row in np.flatnonzero((stacked != None).any(axis=1)):  # noqa: E711
+            errors.iloc[row] = "; ".join(message for message in stacked[row] if message is not None)
+    return clean, errors
+
+
+def iter_input_chunks(path, chunk_size, skip_rows=0, skip_chunks=0):
+    """
+    Yields DataFrames from a CSV or Parquet file. CSV resumes by skipping rows,
+    Parquet by skipping whole record batches, so neither re-parses finished work twice.
+    """
+    if str(path).endswith('.parquet'):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Reading Parquet requires pyarrow: pip install pyarrow")
+        for index, batch in enumerate(pq.ParquetFile(path).iter_batches(batch_size=chunk_size)):
+            if index >= skip_chunks:
+                yield batch.to_pandas()
+        return
+
+    skiprows = (lambda i: 0 < i <= skip_rows) if skip_rows else None
+    yield from pd.read_csv(path, chunksize=chunk_size, skiprows=skiprows)
+
+
+def count_rows(path):
+    if str(path).endswith('.parquet'):
+        import pyarrow.parquet as pq
+        return pq.ParquetFile(path).metadata.num_rows
+    return None
+
+
+def _init_worker(artifact_dir):
+    global _service
+    _service = ExplainerService(warm=False, **service_paths(artifact_dir))
+
+
+def score_chunk(frame, start_row, explain=False, mode='deeplift', keep_columns=()):
+    """
+    Scores one chunk with the worker's service. Invalid rows keep their place in
+    the output with an empty prediction and an error message.
+    """
+    clean, errors = validate_frame(frame)
+    valid = errors.isna().to_numpy()
+
+    out = pd.DataFrame({'row': np.arange(start_row, start_row + len(frame))}, index=frame.index)
+    for column in keep_columns:
+        out[column] = frame[column]
+
+    if valid.any():
+        scored = _service.score_frame(clean[valid], explain=explain, mode=mode)
+    else:
+        # Nothing to score, but the columns must still line up with the other chunks
+        scored = pd.DataFrame(columns=_service.score_frame_columns(explain), dtype=np.float64)
+    scored = scored.reindex(frame.index)
+    out = pd.concat([out, scored], axis=1)
+    out['error'] = errors
+    return out.reset_index(drop=True)
+
+
+class CsvOutput:
+    def __init__(self, path):
+        self.path = path
+
+    def reset(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def truncate(self, position):
+        # Drops anything written after the last checkpoint
+        with open(self.path, 'r+b') as f:
+            f.truncate(position)
+
+    def write(self, frame, index):
+        header = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        with open(self.path, 'a', newline='') as f:
+            frame.to_csv(f, header=header, index=False)
+        return os.path.getsize(self.path)
+
+
+class ParquetOutput:
+    """
+    A directory of part-NNNNNN.parquet files, readable with pd.read_parquet(directory).
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def _parts(self):
+        if not os.path.isdir(self.path):
+            return []
+        return sorted(name for name in os.listdir(self.path) if name.startswith('part-'))
+
+    def reset(self):
+        for name in self._parts():
+            os.remove(os.path.join(self.path, name))
+
+    def truncate(self, position):
+        for name in self._parts()[position:]:
+            os.remove(os.path.join(self.path, name))
+
+    def write(self, frame, index):
+        os.makedirs(self.path, exist_ok=True)
+        frame.to_parquet(os.path.join(self.path, f'part-{index:06d}.parquet'), index=False)
+        return index + 1
+
+
+def load_checkpoint(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_checkpoint(path, state):
+    # Write-then-rename, so a crash never leaves a torn checkpoint
+    staging = f'{path}.tmp'
+    with open(staging, 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(staging, path)
+
+
+def score_file(input_path, output_path, artifact_dir='backend', chunk_size=DEFAULT_CHUNK_SIZE, workers=None,
+               max_in_flight=None, explain=False, mode='deeplift', keep_columns=(), resume=False, checkpoint_path=None):
+    """
+    Scores `input_path` into `output_path` with a pool of `workers` processes.
+    At most `max_in_flight` chunks are queued or held for ordering at any time,
+    so memory stays proportional to chunk_size * max_in_flight whatever the file size.
+    """
+    workers = workers or os.cpu_count()
+    max_in_flight = max_in_flight or 2 * workers
+    checkpoint_path = checkpoint_path or f'{output_path}.checkpoint.json'
+
+    if explain and mode not in GRADIENT_MODES:
+        raise ValueError(f"Offline attributions must use one of {GRADIENT_MODES}, got '{mode}'")
+
+    # Loads once in the parent to fail fast and to pin the model version in the checkpoint
+    service = ExplainerService(warm=False, **service_paths(artifact_dir))
+    if not service.is_loaded:
+        raise ValueError(f"No model artifacts found in {artifact_dir}")
+
+    output = ParquetOutput(output_path) if str(output_path).endswith('.parquet') else CsvOutput(output_path)
+    stat = os.stat(input_path)
+    identity = {
+        'input': os.path.abspath(input_path),
+        'input_bytes': stat.st_size,
+        'input_mtime': stat.st_mtime,
+        'chunk_size': chunk_size,
+        'explain': explain,
+        'mode': mode if explain else None,
+        'keep_columns': list(keep_columns),
+        'model_version': service.model_version
+    }
+
+    state = {**identity, 'chunks_done': 0, 'rows_done': 0, 'invalid_rows': 0, 'output_position': 0, 'finished': False}
+    if resume:
+        previous = load_checkpoint(checkpoint_path)
+        if previous is None:
+            print(f"No checkpoint at {checkpoint_path}; starting from the beginning.")
+            output.reset()
+        else:
+            changed = [key for key, value in identity.items() if previous.get(key) != value]
+            if changed:
+                raise ValueError(f"Checkpoint does not match this run (changed: {changed}); rerun without --resume")
+            if previous['finished']:
+                print(f"{output_path} is already complete ({previous['rows_done']} rows).")
+                return previous
+            state = previous
+            output.truncate(state['output_position'])
+            print(f"Resuming after chunk {state['chunks_done']} ({state['rows_done']} rows).")
+    else:
+        output.reset()
+
+    total_rows = count_rows(input_path)
+    chunks = iter_input_chunks(input_path, chunk_size, skip_rows=state['rows_done'], skip_chunks=state['chunks_done'])
+    started = time.perf_counter()
+    rows_at_start = state['rows_done']
+
+    def write(index, result):
+        state['output_position'] = output.write(result, index)
+        state['chunks_done'] = index + 1
+        state['rows_done'] += len(result)
+        state['invalid_rows'] += int(result['error'].notna().sum())
+        save_checkpoint(checkpoint_path, state)
+
+        rate = (state['rows_done'] - rows_at_start) / max(time.perf_counter() - started, 1e-9)
+        progress = f"{state['rows_done']:,} rows"
+        if total_rows:
+            eta = (total_rows - state['rows_done']) / rate if rate else float('inf')
+            progress = f"{state['rows_done']:,}/{total_rows:,} rows ({state['rows_done'] / total_rows:.1%}, ETA {eta:.0f}s)"
+        print(f"Chunk {index}: {progress}, {rate:,.0f} rows/s, {state['invalid_rows']:,} invalid", flush=True)
+
+    print(f"Scoring {input_path} -> {output_path} with {workers} workers, chunks of {chunk_size:,} rows")
+    pool = process_pool(workers, _init_worker, (artifact_dir,))
+    try:
+        pending = {}
+        next_index = state['chunks_done']
+        start_row = state['rows_done']
+        for index, frame in enumerate(chunks, start=state['chunks_done']):
+            pending[index] = pool.submit(score_chunk, frame, start_row, explain, mode, tuple(keep_columns))
+            start_row += len(frame)
+            # Results are written strictly in order; waiting on the oldest chunk bounds the window
+            while len(pending) >= max_in_flight:
+                write(next_index, pending.pop(next_index).result())
+                next_index += 1
+
+        while pending:
+            write(next_index, pending.pop(next_index).result())
+            next_index += 1
+    except KeyboardInterrupt:
+        # Everything up to the checkpoint is on disk; queued chunks are dropped
+        print(f"Interrupted after chunk {state['chunks_done'] - 1}; rerun with --resume to continue.")
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise SystemExit(130)
+    pool.shutdown()
+
+    state['finished'] = True
+    save_checkpoint(checkpoint_path, state)
+    elapsed = time.perf_counter() - started
+    print(f"Done: {state['rows_done']:,} rows ({state['invalid_rows']:,} invalid) in {elapsed:.1f}s")
+    return state
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score a CSV/Parquet file of voyages offline")
+    parser.add_argument("--input", required=True, help="voyages as .csv or .parquet")
+    parser.add_argument("--output", required=True, help=".csv file, or .parquet directory of part files")
+    parser.add_argument("--artifact-dir", default="backend", help="model_bundle/ or .pkl artifacts directory")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--max-in-flight", type=int, default=None, help="chunks queued at once (default: 2 x workers)")
+    parser.add_argument("--explain", action="store_true", help="add per-feature attribution columns")
+    parser.add_argument("--attribution-mode", choices=GRADIENT_MODES, default="deeplift")
+    parser.add_argument("--keep", default="", help="comma-separated input columns copied to the output, e.g. an ID")
+    parser.add_argument("--resume", action="store_true", help="continue from the checkpoint next to the output")
+    parser.add_argument("--checkpoint", default=None, help="checkpoint path (default <output>.checkpoint.json)")
+    args = parser.parse_args()
+
+    score_file(args.input, args.output, artifact_dir=args.artifact_dir, chunk_size=args.chunk_size,
+               workers=args.workers, max_in_flight=args.max_in_flight, explain=args.explain,
+               mode=args.attribution_mode, keep_columns=[c.strip() for c in args.keep.split(",") if c.strip()],
+               resume=args.resume, checkpoint_path=args.checkpoint)
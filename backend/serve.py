@@ -0,0 +1,137 @@
+"""
+Pre-fork server for the API.
+
+The parent process loads and warms the model once, opens the listening socket and
+forks the uvicorn workers. Workers inherit the loaded service, so its read-only
+pages (bundle weights, the compiled pipeline, imported modules) are shared
+copy-on-write instead of every worker unpickling its own copy.
+
+    python backend/serve.py --workers 4 --port 8000
+
+Signals to the parent: SIGTERM / SIGINT stop every worker gracefully. SIGHUP reloads
+the model in the parent, forks a fresh set of workers, then retires the old ones.
+A worker that dies unexpectedly is replaced.
+"""
+import argparse
+import gc
+import os
+import signal
+import socket
+import time
+
+import uvicorn
+
+import main as api
+
+# Pause before replacing a crashed worker, so a worker that cannot start does not spin
+RESPAWN_DELAY_SECONDS = 1.0
+
+
+def load_in_parent(lazy_shap):
+    api.LAZY_SHAP = lazy_shap
+    # Process pools and their shared memory cannot be handed across fork
+    api.WARM_SHAP_POOL = False
+    started = time.perf_counter()
+    api.load_model()
+    service = api.explainer
+    if service is None or not service.is_loaded:
+        print("No model loaded; workers will answer 503 until artifacts exist and SIGHUP is sent.")
+    else:
+        print(f"Model {service.model_version} loaded in parent in {(time.perf_counter() - started) * 1000:.0f} ms")
+    # Objects allocated so far are never scanned by the collector, which would otherwise
+    # write to their headers and un-share the pages in every worker
+    gc.freeze()
+
+
+def bind_socket(host, port):
+    sock = socket.socket(socket.AF_INET6 if ':' in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(sock, log_level):
+    # The parent's handlers must not fire in the worker; uvicorn installs its own
+    for signum in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, signal.SIG_DFL)
+    config = uvicorn.Config(api.app, log_level=log_level, lifespan="on")
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def serve(host='0.0.0.0', port=8000, workers=2, lazy_shap=True, log_level='info'):
+    load_in_parent(lazy_shap)
+    sock = bind_socket(host, port)
+    print(f"Serving on {host}:{port} with {workers} pre-forked workers (parent pid {os.getpid()})")
+
+    children = set()
+    retired = set()
+    state = {'stopping': False}
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            # Own process group: a terminal Ctrl-C reaches only the parent, which forwards one SIGTERM
+            os.setpgid(0, 0)
+            try:
+                run_worker(sock, log_level)
+            finally:
+                os._exit(0)
+        children.add(pid)
+
+    def stop(signum, frame):
+        state['stopping'] = True
+        for pid in children:
+            os.kill(pid, signal.SIGTERM)
+
+    def reload(signum, frame):
+        if state['stopping']:
+            return
+        print("SIGHUP: reloading model and replacing workers...")
+        api.explainer = None
+        gc.unfreeze()
+        load_in_parent(lazy_shap)
+        old = set(children)
+        for _ in range(workers):
+            spawn()
+        # Old workers finish their in-flight requests before exiting
+        for pid in old:
+            retired.add(pid)
+            os.kill(pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGHUP, reload)
+
+    for _ in range(workers):
+        spawn()
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        children.discard(pid)
+        if pid in retired:
+            retired.discard(pid)
+            continue
+        if not state['stopping']:
+            print(f"Worker {pid} exited with status {status}; starting a replacement")
+            time.sleep(RESPAWN_DELAY_SECONDS)
+            spawn()
+
+    sock.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-fork server: load the model once, share it across workers")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--warm-kernel", action="store_true",
+                        help="import shap and build KernelExplainer in the parent (default: on first kernel request)")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    serve(host=args.host, port=args.port, workers=args.workers, lazy_shap=not args.warm_kernel, log_level=args.log_level)
@@ -0,0 +1,77 @@
+import contextlib
+import io
+import os
+import sys
+import warnings
+
+import pytest
+
+# The backend runs from its own directory and imports its modules by bare name
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_generator import SAMPLE_VOYAGE, sample_voyage as voyage  # noqa: E402
+
+
+def quietly(fn, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()), warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return fn(*args, **kwargs)
+
+
+@pytest.fixture(scope="session")
+def artifact_dir(tmp_path_factory):
+    """
+    A small model trained once per session: pickles, SHAP background and model_bundle/.
+    """
+    from data_generator import write_synthetic_data
+    from train_model import train_model
+
+    directory = tmp_path_factory.mktemp("artifacts")
+    data_path = str(directory / "train.csv")
+    write_synthetic_data(data_path, 1000, seed=0)
+    quietly(train_model, data_path=data_path, output_dir=str(directory))
+    return str(directory)
+
+
+@pytest.fixture(scope="session")
+def service_paths(artifact_dir):
+    from explainability import service_paths
+    return service_paths(artifact_dir)
+
+
+def make_service(paths, **options):
+    """
+    An ExplainerService on `paths`, left unwarmed unless the options say warm=True.
+    """
+    from explainability import ExplainerService
+    options.setdefault("warm", False)
+    return quietly(ExplainerService, **options, **paths)
+
+
+@pytest.fixture(scope="module")
+def service(request, service_paths):
+    """
+    An unwarmed ExplainerService on the session artifacts. Parametrize it indirectly with
+    a dict of extra ExplainerService options, e.g. {"shap_workers": 2}.
+    """
+    service = make_service(service_paths, **getattr(request, "param", {}))
+    yield service
+    service.close()
+
+
+@pytest.fixture
+def api(artifact_dir, monkeypatch):
+    """
+    main with its module-level service, prediction cache and batcher reset, pointed at
+    the session artifacts. The startup hooks build them again.
+    """
+    import main
+
+    monkeypatch.setattr(main, "explainer", None)
+    monkeypatch.setattr(main, "cache", None)
+    monkeypatch.setattr(main, "batcher", None)
+    monkeypatch.setattr(main, "ARTIFACT_DIR", artifact_dir)
+    monkeypatch.setattr(main, "BUNDLE_DIR", f"{artifact_dir}/model_bundle")
+    monkeypatch.setattr(main, "CACHE_SIZE", 16)
+    monkeypatch.setattr(main, "LAZY_SHAP", True)
+    return main
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+import attribution
+import explainability
+from conftest import quietly
+from data_generator import generate_synthetic_data
+from metrics import MetricsRegistry
+
+# Mismatches are counted, so the service needs a registry that records
+pytestmark = pytest.mark.parametrize("service", [{"metrics": MetricsRegistry()}], indirect=True)
+
+
+@pytest.fixture(scope="module")
+def processed(service):
+    frame = generate_synthetic_data(64, seed=7).drop(columns="Fuel_Consumption_Tons")
+    return service._transform(frame.to_dict("records"))
+
+
+def reference(service, processed):
+    """
+    f(x) and E[f] straight from the member weights, in float64.
+    """
+    background = service._ensure_background()
+    outputs, expected = [], []
+    for coefs, intercepts in service._member_weights():
+        outputs.append(attribution.forward_pre_activations(processed, coefs, intercepts)[-1].ravel())
+        expected.append(attribution.expected_output(background, coefs, intercepts, service.background_weights))
+    return np.mean(outputs, axis=0), float(np.mean(expected))
+
+
+def test_deeplift_is_additive(service, processed):
+    f_x, expected = reference(service, processed)
+    vals, base_value = service._attribution_matrix(processed, f_x, "deeplift")
+    assert base_value == pytest.approx(expected, abs=1e-9)
+    np.testing.assert_allclose(vals.sum(axis=1), f_x - expected, rtol=0, atol=explainability.ADDITIVITY_TOLERANCE)
+
+
+def test_integrated_gradients_is_nearly_additive(service, processed):
+    f_x, expected = reference(service, processed)
+    vals, base_value = service._attribution_matrix(processed, f_x, "integrated_gradients")
+    assert base_value == pytest.approx(expected, abs=1e-9)
+    # Riemann-sum error: a small fraction of the explained difference
+    gap = np.abs(vals.sum(axis=1) - (f_x - expected))
+    assert np.all(gap <= 0.02 * np.abs(f_x - expected) + 0.5)
+
+
+def test_additivity_drift_is_counted_not_raised(service, processed, monkeypatch):
+    monkeypatch.setattr(explainability, "ADDITIVITY_TOLERANCE", -1.0)
+    predictions = service._predict_processed(processed)
+    vals, _ = quietly(service._attribution_matrix, processed, predictions, "deeplift")
+    assert vals.shape == processed.shape
+    assert service.metrics.counters["vesselfuel_attribution_additivity_mismatches_total"][1] == len(processed)
+    assert "# TYPE vesselfuel_attribution_additivity_mismatches_total counter" in service.metrics.render()
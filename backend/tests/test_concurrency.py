@@ -0,0 +1,23 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from conftest import quietly, voyage
+
+
+def test_concurrent_kernel_explanations_are_additive(service):
+    rows = [voyage(i) for i in range(32)]
+
+    def explain(i):
+        # Alternate single rows and small batches, like the threadpool and batcher paths
+        if i % 2:
+            return [service.explain(rows[i], mode="kernel", tier="reduced")]
+        return service.explain_batch(rows[i:i + 3], explain=True, mode="kernel", tier="reduced")
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = [result for batch in quietly(lambda: list(pool.map(explain, range(len(rows))))) for result in batch]
+
+    assert len(results) == sum(1 if i % 2 else len(rows[i:i + 3]) for i in range(len(rows)))
+    for result in results:
+        total = sum(result["contributions"].values()) + result["base_value"]
+        assert total == pytest.approx(result["predicted_fuel_tons"], abs=0.05)
@@ -0,0 +1,51 @@
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.stats import ks_2samp
+
+from data_generator import generate_synthetic_data, generate_synthetic_data_loop, iter_synthetic_chunks
+
+LOOP_ROWS = 4000
+VECTOR_ROWS = 20000
+
+
+@pytest.fixture(scope="module")
+def frames():
+    random.seed(0)
+    np.random.seed(0)
+    return generate_synthetic_data_loop(LOOP_ROWS), generate_synthetic_data(VECTOR_ROWS, seed=0)
+
+
+def test_same_schema(frames):
+    loop, vectorized = frames
+    assert list(vectorized.columns) == list(loop.columns)
+    for column in loop.columns:
+        assert pd.api.types.is_numeric_dtype(vectorized[column]) == pd.api.types.is_numeric_dtype(loop[column]), column
+
+
+def test_numeric_columns_match_the_reference_loop(frames):
+    loop, vectorized = frames
+    for column in loop.select_dtypes("number").columns:
+        statistic, p_value = ks_2samp(loop[column], vectorized[column])
+        assert p_value > 1e-3, f"{column}: KS statistic {statistic:.3f}, p={p_value:.2e}"
+        assert vectorized[column].mean() == pytest.approx(loop[column].mean(), rel=0.05, abs=0.05), column
+        assert vectorized[column].std() == pytest.approx(loop[column].std(), rel=0.1, abs=0.05), column
+
+
+def test_categorical_frequencies_match_the_reference_loop(frames):
+    loop, vectorized = frames
+    for column in loop.select_dtypes(exclude="number").columns:
+        expected = loop[column].value_counts(normalize=True)
+        actual = vectorized[column].value_counts(normalize=True)
+        assert set(actual.index) == set(expected.index), column
+        for value, share in expected.items():
+            assert actual[value] == pytest.approx(share, abs=0.03), f"{column}={value}"
+
+
+def test_seeded_output_is_reproducible():
+    first = generate_synthetic_data(500, seed=3)
+    pd.testing.assert_frame_equal(first, generate_synthetic_data(500, seed=3))
+    chunks = pd.concat(list(iter_synthetic_chunks(500, chunk_size=128, seed=3)), ignore_index=True)
+    pd.testing.assert_frame_equal(chunks, pd.concat(list(iter_synthetic_chunks(500, chunk_size=128, seed=3)), ignore_index=True))
@@ -0,0 +1,86 @@
+import os
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.neural_network import MLPRegressor
+
+from conftest import voyage
+from data_generator import generate_synthetic_data
+from fast_inference import PARITY_RTOL, CompiledPipeline
+
+
+@pytest.fixture(scope="module")
+def fitted(artifact_dir):
+    preprocessor = joblib.load(os.path.join(artifact_dir, "preprocessor.pkl"))
+    model = joblib.load(os.path.join(artifact_dir, "maritime_model.pkl"))
+    return preprocessor, model
+
+
+@pytest.fixture(scope="module")
+def frame():
+    return generate_synthetic_data(300, seed=11).drop(columns="Fuel_Consumption_Tons")
+
+
+def sklearn_predict(preprocessor, members, frame):
+    X = preprocessor.transform(frame)
+    return np.mean([member.predict(X) for member in members], axis=0)
+
+
+def assert_parity(actual, expected, dtype=np.float64):
+    rtol = PARITY_RTOL[np.dtype(dtype)]
+    np.testing.assert_allclose(actual, expected, rtol=rtol, atol=rtol)
+
+
+def test_single_records(fitted, frame):
+    preprocessor, model = fitted
+    pipeline = CompiledPipeline.from_sklearn(preprocessor, model)
+    for record in frame.head(20).to_dict("records") + [voyage(0)]:
+        expected = sklearn_predict(preprocessor, [model], pd.DataFrame([record]))
+        assert_parity(pipeline.predict_records([record]), expected)
+
+
+def test_columnar_batches(fitted, frame):
+    preprocessor, model = fitted
+    pipeline = CompiledPipeline.from_sklearn(preprocessor, model)
+    expected = sklearn_predict(preprocessor, [model], frame)
+    assert_parity(pipeline.predict_columns(frame), expected)
+    assert_parity(pipeline.predict_columns({column: frame[column].to_numpy() for column in frame.columns}), expected)
+    assert_parity(pipeline.predict_records(frame.to_dict("records")), expected)
+    np.testing.assert_allclose(pipeline.transform_columns(frame), preprocessor.transform(frame), rtol=0, atol=1e-12)
+
+
+def test_unseen_categories(fitted, frame):
+    preprocessor, model = fitted
+    pipeline = CompiledPipeline.from_sklearn(preprocessor, model)
+    unseen = frame.head(10).copy()
+    unseen["Ship_Type"] = "Hovercraft"
+    unseen.loc[unseen.index[::2], "Fuel_Type"] = "Hydrogen"
+
+    expected = sklearn_predict(preprocessor, [model], unseen)
+    assert_parity(pipeline.predict_columns(unseen), expected)
+    assert_parity(pipeline.predict_records(unseen.to_dict("records")), expected)
+
+    strict = CompiledPipeline.from_sklearn(preprocessor, model)
+    strict.handle_unknown = "error"
+    with pytest.raises(ValueError, match="unknown category"):
+        strict.predict_records(unseen.to_dict("records"))
+
+
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+def test_stacked_ensemble(fitted, frame, dtype):
+    preprocessor, _ = fitted
+    X = preprocessor.transform(frame)
+    y = generate_synthetic_data(300, seed=11)["Fuel_Consumption_Tons"]
+    members = []
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        for seed in range(3):
+            members.append(MLPRegressor(hidden_layer_sizes=(16, 8), max_iter=50, random_state=seed).fit(X, y))
+
+    pipeline = CompiledPipeline.from_sklearn(preprocessor, members, dtype=dtype)
+    assert pipeline.stacked is not None
+    assert_parity(pipeline.predict_columns(frame), sklearn_predict(preprocessor, members, frame), dtype)
+    assert pipeline.check_parity(preprocessor, members) >= 0.0
@@ -0,0 +1,37 @@
+from conftest import SAMPLE_VOYAGE, quietly
+from metrics import MetricsRegistry
+from prediction_cache import PredictionCache
+
+
+def series_types(text):
+    return dict(line.split()[2:4] for line in text.splitlines() if line.startswith("# TYPE"))
+
+
+def test_counters_and_gauges_are_typed():
+    registry = MetricsRegistry()
+    registry.count("vesselfuel_things_total", "Things.", 3)
+    text = registry.render(gauges=[("vesselfuel_queue_depth", "Depth.", 2)],
+                           counters=[("vesselfuel_cache_hits_total", "Hits.", 5)])
+
+    types = series_types(text)
+    assert types["vesselfuel_queue_depth"] == "gauge"
+    assert types["vesselfuel_cache_hits_total"] == "counter"
+    assert types["vesselfuel_things_total"] == "counter"
+    assert "vesselfuel_cache_hits_total 5.0" in text
+    assert "vesselfuel_things_total 3" in text
+
+
+def test_metrics_endpoint_exposes_cache_counts_as_counters(api):
+    from fastapi.testclient import TestClient
+
+    with quietly(TestClient, api.app) as client:
+        assert api.explainer.bundle_path == api.BUNDLE_DIR
+        for _ in range(2):
+            assert client.post("/predict?attribution_mode=deeplift", json=SAMPLE_VOYAGE).status_code == 200
+        types = series_types(client.get("/metrics").text)
+
+    assert isinstance(api.cache, PredictionCache)
+    for name in ("hits", "misses", "evictions", "expirations"):
+        assert types[f"vesselfuel_cache_{name}_total"] == "counter"
+        assert f"vesselfuel_cache_{name}" not in types
+    assert types["vesselfuel_cache_entries"] == "gauge"
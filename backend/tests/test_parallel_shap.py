@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+
+from conftest import make_service, quietly, voyage
+from explainability import PARALLEL_SHAP_MIN_ROWS
+
+
+def contributions(results):
+    return np.array([list(result["contributions"].values()) for result in results])
+
+
+@pytest.fixture(scope="module")
+def pooled(service_paths):
+    pooled = make_service(service_paths, shap_workers=2)
+    yield pooled
+    pooled.close()
+
+
+def test_output_does_not_depend_on_worker_count(service, pooled):
+    in_process = service
+    rows = [voyage(i) for i in range(PARALLEL_SHAP_MIN_ROWS + 2)]
+
+    expected = quietly(in_process.explain_batch, rows, explain=True, tier="reduced")
+    # Repeatable in-process
+    again = quietly(in_process.explain_batch, rows, explain=True, tier="reduced")
+    np.testing.assert_array_equal(contributions(again), contributions(expected))
+
+    # Same rows on the pool, and a batch small enough to stay in-process with workers set
+    actual = quietly(pooled.explain_batch, rows, explain=True, tier="reduced")
+    np.testing.assert_allclose(contributions(actual), contributions(expected), rtol=0, atol=1e-9)
+    assert [r["base_value"] for r in actual] == [r["base_value"] for r in expected]
+
+    small = rows[:PARALLEL_SHAP_MIN_ROWS - 1]
+    np.testing.assert_allclose(contributions(quietly(pooled.explain_batch, small, explain=True, tier="reduced")),
+                               contributions(expected)[:len(small)], rtol=0, atol=1e-9)
+
+
+def test_pool_is_not_started_before_fork(service_paths):
+    service = make_service(service_paths, warm=True, shap_workers=2, warm_shap_pool=False)
+    assert service.ready
+    assert service.shap_pool is None
+    service.close()
+
+
+def test_forked_child_does_not_close_the_parents_pool(pooled):
+    import os
+
+    rows = [voyage(i) for i in range(PARALLEL_SHAP_MIN_ROWS)]
+    before = quietly(pooled.explain_batch, rows, explain=True, tier="reduced")
+    pool = pooled.shap_pool
+    assert pool is not None and pool.owned
+
+    pid = os.fork()
+    if pid == 0:
+        # What a pre-forked worker's shutdown hook does
+        try:
+            pooled.close()
+        finally:
+            os._exit(0)
+    os.waitpid(pid, 0)
+
+    assert pooled.shap_pool is pool
+    after = quietly(pooled.explain_batch, [voyage(100 + i) for i in range(PARALLEL_SHAP_MIN_ROWS)], explain=True, tier="reduced")
+    assert len(after) == len(before)
+
+
+def test_close_racing_a_kernel_request_falls_back_in_process(service, service_paths):
+    in_process = service
+    rows = [voyage(i) for i in range(PARALLEL_SHAP_MIN_ROWS)]
+    expected = quietly(in_process.explain_batch, rows, explain=True, tier="reduced")
+
+    # close() lands after the request saw shap_workers but before it asked for the pool
+    service = make_service(service_paths, shap_workers=2)
+    take_pool = service._parallel_shap
+
+    def close_first():
+        service.close()
+        return take_pool()
+
+    service._parallel_shap = close_first
+    actual = quietly(service.explain_batch, rows, explain=True, tier="reduced")
+    assert service.shap_pool is None
+    np.testing.assert_allclose(contributions(actual), contributions(expected), rtol=0, atol=1e-9)
+
+    # close() lands after the request took the pool but before it submitted
+    service = make_service(service_paths, shap_workers=2)
+    take_pool = service._parallel_shap
+
+    def close_after():
+        pool = take_pool()
+        service.close()
+        return pool
+
+    service._parallel_shap = close_after
+    actual = quietly(service.explain_batch, rows, explain=True, tier="reduced")
+    assert service.shap_pool is None
+    np.testing.assert_allclose(contributions(actual), contributions(expected), rtol=0, atol=1e-9)
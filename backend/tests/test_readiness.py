@@ -0,0 +1,71 @@
+import json
+import os
+import shutil
+
+import explainability
+from conftest import make_service, quietly, voyage
+from explainability import ExplainerService
+
+
+def pickles_without_background(artifact_dir, tmp_path):
+    for name in ("maritime_model.pkl", "preprocessor.pkl", "feature_names.pkl"):
+        shutil.copy(os.path.join(artifact_dir, name), tmp_path / name)
+    return {
+        "model_path": str(tmp_path / "maritime_model.pkl"),
+        "preprocessor_path": str(tmp_path / "preprocessor.pkl"),
+        "features_col_path": str(tmp_path / "feature_names.pkl"),
+        "background_path": str(tmp_path / "missing_background.pkl"),
+        "ensemble_path": None
+    }
+
+
+def test_warm_up_with_synthetic_background(artifact_dir, tmp_path):
+    service = make_service(pickles_without_background(artifact_dir, tmp_path), warm=True, warm_kernel=False)
+    assert service.is_loaded
+    assert service.ready
+    assert service.background_summary.shape[0] > 0
+
+
+def test_failed_warm_up_recovers(artifact_dir, tmp_path, monkeypatch):
+    paths = pickles_without_background(artifact_dir, tmp_path)
+
+    def broken_background(self):
+        raise RuntimeError("background unavailable")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(ExplainerService, "_ensure_background", broken_background)
+        service = make_service(paths, warm=True, warm_kernel=False)
+        assert service.is_loaded and not service.ready
+        # Still failing: the retry is throttled and leaves the service unready
+        assert not quietly(service.retry_warm_up)
+
+    # Retried once the interval has passed
+    monkeypatch.setattr(explainability, "WARM_UP_RETRY_SECONDS", 0.0)
+    assert quietly(service.retry_warm_up)
+
+    # A successful lazy explanation also marks the service ready
+    with monkeypatch.context() as patch:
+        patch.setattr(ExplainerService, "_ensure_background", broken_background)
+        service = make_service(paths, warm=True, warm_kernel=False)
+    assert not service.ready
+    quietly(service.explain, voyage(0), mode="deeplift")
+    assert service.ready
+
+
+def test_health_tells_unavailable_from_warming(api, artifact_dir, tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    # Nothing to load: the startup hook leaves the service unloaded
+    monkeypatch.setattr(api, "ARTIFACT_DIR", str(tmp_path))
+    monkeypatch.setattr(api, "BUNDLE_DIR", str(tmp_path / "model_bundle"))
+    with quietly(TestClient, api.app) as client:
+        response = client.get("/health")
+    assert response.status_code == 503
+    assert response.json() == {"status": "unavailable", "model_loaded": False, "ready": False}
+
+    # Loaded but not warm yet
+    monkeypatch.setattr(api, "explainer", make_service(pickles_without_background(artifact_dir, tmp_path)))
+    monkeypatch.setattr(api.explainer, "retry_warm_up", lambda: False)
+    response = api.health_check()
+    assert response.status_code == 503
+    assert json.loads(response.body)["status"] == "warming"
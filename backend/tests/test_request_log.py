@@ -0,0 +1,60 @@
+import math
+import os
+
+from request_log import LOG_SUFFIX, RequestLogger, iter_records, log_files
+
+
+def records(n):
+    for i in range(n):
+        record = {"ts": 1000.0 + i, "path": "/predict", "latency_ms": 1.5 * i, "input.Wind_Beaufort": i % 12,
+                  "input.Ship_Type": ["Container", "Tanker"][i % 2]}
+        if i % 3 == 0:
+            record["stage.attribution_deeplift"] = 0.25
+        yield record
+
+
+def test_round_trip_with_rotation_and_retention(tmp_path):
+    logger = RequestLogger(str(tmp_path), max_bytes=2048, max_files=3, flush_interval=0.01, flush_rows=20)
+    for record in records(2000):
+        logger.log(record)
+    logger.close()
+
+    # Older files were rotated out; the newest three remain, none past the size limit
+    files = log_files(str(tmp_path))
+    assert len(files) == 3
+    assert all(os.path.getsize(path) <= 2048 for path in files)
+
+    logger = RequestLogger(str(tmp_path / "all"), flush_interval=0.01)
+    for record in records(500):
+        logger.log(record)
+    logger.close()
+    read = list(iter_records(str(tmp_path / "all")))
+    assert logger.stats()["logged"] == len(read) == 500
+    assert {key: read[4][key] for key in ("ts", "path", "latency_ms", "input.Wind_Beaufort")} == \
+        {"ts": 1004.0, "path": "/predict", "latency_ms": 6.0, "input.Wind_Beaufort": 4}
+    # Absent from a record reads back as NaN
+    assert math.isnan(read[4]["stage.attribution_deeplift"])
+    assert read[3]["stage.attribution_deeplift"] == 0.25
+    assert [r["input.Ship_Type"] for r in read[:2]] == ["Container", "Tanker"]
+
+
+def test_truncated_tail_is_skipped(tmp_path):
+    logger = RequestLogger(str(tmp_path), flush_interval=0.01)
+    for record in records(10):
+        logger.log(record)
+    logger.close()
+    path = log_files(str(tmp_path))[0]
+    assert path.endswith(LOG_SUFFIX)
+
+    with open(path, "ab") as f:
+        f.write(b"VFL1\x10\x00")
+    assert len(list(iter_records(path))) == 10
+
+
+def test_full_buffer_drops_instead_of_blocking(tmp_path):
+    logger = RequestLogger(str(tmp_path), flush_interval=60, flush_rows=10**6, max_pending=5)
+    for record in records(8):
+        logger.log(record)
+    assert logger.stats()["dropped"] == 3
+    logger.close()
+    assert len(list(iter_records(str(tmp_path)))) == 5
@@ -0,0 +1,36 @@
+import pandas as pd
+
+from conftest import quietly, voyage
+from score_voyages import score_file
+
+
+def test_all_invalid_chunk_with_explain(artifact_dir, tmp_path):
+    rows = [voyage(i) for i in range(4)]
+    # The second chunk has no valid row at all
+    rows += [{**voyage(i), "DWT": "n/a"} for i in range(4, 8)]
+    input_path = tmp_path / "voyages.csv"
+    output_path = tmp_path / "scored.csv"
+    pd.DataFrame(rows).to_csv(input_path, index=False)
+
+    state = quietly(score_file, str(input_path), str(output_path), artifact_dir=artifact_dir, chunk_size=4,
+                    workers=1, explain=True, mode="deeplift")
+
+    assert state["finished"]
+    assert state["invalid_rows"] == 4
+    scored = pd.read_csv(output_path)
+    assert list(scored["row"]) == list(range(8))
+    assert scored["predicted_fuel_tons"][:4].notna().all()
+    assert scored["predicted_fuel_tons"][4:].isna().all()
+    assert scored["error"][4:].str.contains("DWT").all()
+    contributions = [column for column in scored.columns if column.startswith("contrib_")]
+    assert contributions and scored.loc[:3, contributions].notna().all().all()
+
+
+def test_empty_attribution_matrix(service):
+    import numpy as np
+
+    empty = np.zeros((0, len(service._get_feature_names_after_encoding())))
+    for mode in ("deeplift", "integrated_gradients", "kernel"):
+        vals, base_value = quietly(service._attribution_matrix, empty, np.zeros(0), mode)
+        assert vals.shape == empty.shape
+        assert np.isfinite(base_value)
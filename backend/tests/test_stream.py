@@ -0,0 +1,41 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from conftest import SAMPLE_VOYAGE, quietly
+
+
+def stream(client, **params):
+    response = client.post("/predict/stream", params=params, json=SAMPLE_VOYAGE)
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.text.splitlines() if line]
+
+
+@pytest.mark.parametrize("batch_size", [1, 32])
+def test_stream_reuses_the_first_forward_pass(api, monkeypatch, batch_size):
+    monkeypatch.setattr(api, "BATCH_MAX_SIZE", batch_size)
+    monkeypatch.setattr(api, "CACHE_SIZE", 0)
+
+    with quietly(TestClient, api.app) as client:
+        service = api.explainer
+        calls = []
+        transform = service._transform
+        monkeypatch.setattr(service, "_transform", lambda inputs: calls.append(len(inputs)) or transform(inputs))
+
+        prediction, explanation = stream(client, attribution_mode="deeplift")
+
+    assert calls == [1]
+    assert [prediction["event"], explanation["event"]] == ["prediction", "explanation"]
+    assert prediction["predicted_fuel_tons"] == explanation["predicted_fuel_tons"]
+    assert prediction["model_version"] == explanation["model_version"] == service.model_version
+
+
+def test_micro_batch_scores_with_the_service_it_was_given(api, service):
+    # A reload has swapped the global out since the requests started
+    api.explainer = None
+    items = [(service, SAMPLE_VOYAGE, "deeplift", "full", None, None),
+             (service, SAMPLE_VOYAGE, "deeplift", "full", None, service.prepare([SAMPLE_VOYAGE]))]
+    first, second = quietly(api.score_micro_batch, items)
+    assert first == second
+    assert first["attribution_mode"] == "deeplift"
@@ -0,0 +1,54 @@
+import time
+
+import pytest
+from pydantic import ValidationError
+
+from conftest import SAMPLE_VOYAGE
+from explainability import MAX_SWEEP_POINTS
+from schemas import SweepInput
+
+
+def sweep_input(*axes):
+    return SweepInput(base=SAMPLE_VOYAGE, sweep=list(axes))
+
+
+def test_oversized_num_is_rejected_before_expansion(service):
+    with pytest.raises(ValidationError):
+        sweep_input({"field": "Avg_Speed_Knots", "start": 8, "stop": 20, "num": 30_000_000})
+
+    # Direct callers get the same guard without the grid being built
+    started = time.perf_counter()
+    with pytest.raises(ValueError, match="limited"):
+        service.sweep(SAMPLE_VOYAGE, [{"field": "Avg_Speed_Knots", "start": 8, "stop": 20, "num": 10**12}])
+    assert time.perf_counter() - started < 1.0
+
+
+def test_grid_product_is_capped():
+    side = int(MAX_SWEEP_POINTS ** 0.5) + 1
+    with pytest.raises(ValidationError, match="limited"):
+        sweep_input({"field": "Avg_Speed_Knots", "start": 8, "stop": 20, "num": side},
+                    {"field": "Wave_Height_m", "values": [0.5] * side})
+
+
+def test_values_are_validated_against_the_field_type():
+    with pytest.raises(ValidationError, match="Wind_Beaufort"):
+        sweep_input({"field": "Wind_Beaufort", "values": [1, 2.5]})
+    with pytest.raises(ValidationError, match="Wind_Beaufort"):
+        sweep_input({"field": "Wind_Beaufort", "start": 0, "stop": 3, "num": 3})
+    with pytest.raises(ValidationError, match="categorical"):
+        sweep_input({"field": "Season", "start": 0, "stop": 3, "num": 4})
+    with pytest.raises(ValidationError, match="Unknown"):
+        sweep_input({"field": "Not_A_Field", "values": [1]})
+
+    request = sweep_input({"field": "Wind_Beaufort", "values": [1, 2.0]},
+                          {"field": "Avg_Speed_Knots", "start": 10, "stop": 14, "num": 5})
+    assert request.sweep[0].values == [1, 2]
+    assert sweep_input({"field": "Wind_Beaufort", "start": 0, "stop": 12, "num": 7}).sweep[0].num == 7
+
+
+def test_valid_sweep(service):
+    request = sweep_input({"field": "Avg_Speed_Knots", "start": 10, "stop": 14, "num": 5},
+                          {"field": "Season", "values": ["Inter-Monsoon", "Northeast Monsoon"]})
+    result = service.sweep(request.base.model_dump(), [axis.model_dump() for axis in request.sweep])
+    assert result["shape"] == [5, 2]
+    assert result["points"] == 10
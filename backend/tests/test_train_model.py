@@ -0,0 +1,44 @@
+import os
+
+import joblib
+import pytest
+
+from conftest import quietly
+from train_model import ENSEMBLE_FILE, save_artifacts
+
+
+def load_artifacts(artifact_dir):
+    return [joblib.load(os.path.join(artifact_dir, name))
+            for name in ("maritime_model.pkl", "preprocessor.pkl", "feature_names.pkl", "shap_background.pkl")]
+
+
+def test_single_model_removes_a_stale_ensemble(artifact_dir, tmp_path):
+    model, preprocessor, feature_columns, background = load_artifacts(artifact_dir)
+    ensemble_path = tmp_path / ENSEMBLE_FILE
+
+    quietly(save_artifacts, str(tmp_path), model, preprocessor, feature_columns, background, members=[model, model])
+    assert len(joblib.load(ensemble_path)) == 2
+
+    quietly(save_artifacts, str(tmp_path), model, preprocessor, feature_columns, background)
+    assert not ensemble_path.exists()
+
+
+def test_parquet_streams_with_the_csv_schema(tmp_path):
+    pytest.importorskip("pyarrow")
+    from data_generator import write_synthetic_data
+    from train_model import iter_dataset_chunks, train_model_streaming
+
+    schemas = {}
+    for suffix in ("csv", "parquet"):
+        data_path = str(tmp_path / f"train.{suffix}")
+        output_dir = tmp_path / suffix
+        write_synthetic_data(data_path, 600, chunk_size=250, seed=0)
+        quietly(train_model_streaming, data_path=data_path, output_dir=str(output_dir), chunk_size=200, epochs=1)
+
+        chunks = list(iter_dataset_chunks(data_path, chunk_size=200))
+        assert [len(chunk) for chunk in chunks] == [200, 200, 200]
+        preprocessor = joblib.load(output_dir / "preprocessor.pkl")
+        schemas[suffix] = (list(chunks[0].columns), joblib.load(output_dir / "feature_names.pkl"),
+                           list(preprocessor.get_feature_names_out()))
+
+    assert schemas["parquet"] == schemas["csv"]
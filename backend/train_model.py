@@ -1,56 +1,158 @@
 import pandas as pd
 import numpy as np
 import joblib
+import os
+import copy
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler, OneHotEncoder
 from sklearn.compose import ColumnTransformer
 from sklearn.neural_network import MLPRegressor
 from sklearn.metrics import mean_absolute_error
+from sklearn.cluster import KMeans
+from model_bundle import save_bundle, DEFAULT_BUNDLE_DIR
+import dataset_cache
+import sklearn
 
-def train_model():
-    print("Loading data...")
-    df = pd.read_csv('fuel_consumption_data.csv')
-    
-    # Separate features and target
-    X = df.drop('Fuel_Consumption_Tons', axis=1)
-    y = df['Fuel_Consumption_Tons']
-    
-    # Identify Categorical and Numerical columns (V2 Advanced Model)
-    categorical_cols = [
-        'Ship_Type', 'Hull_Fouling', 'Main_Engine_Type', 'Propeller_Type', 
-        'Speed_Profile', 'Season', 'Wind_Direction', 'Current_Direction', 'Fuel_Type'
-    ]
-    
-    numerical_cols = [
-        'DWT', 'GT', 'LOA', 'Beam', 'Design_Speed', 'Draft_Percentage', 
-        'Engine_Power_kW', 'SFOC_g_kWh', 'Distance_NM', 'Avg_Speed_Knots', 
-        'Wind_Beaufort', 'Wave_Height_m', 'Current_Speed_Knots', 'Weather_Routing_Efficiency'
-    ]
-    
-    print(f"Numerical features ({len(numerical_cols)}): {numerical_cols}")
-    print(f"Categorical features ({len(categorical_cols)}): {categorical_cols}")
-    
-    # Preprocessing Pipeline
+# Number of representative rows kept as the SHAP / attribution background
+BACKGROUND_SIZE = 20
+
+TARGET_COL = 'Fuel_Consumption_Tons'
+
+# Seed ensemble members, written next to the single model when there is more than one
+ENSEMBLE_FILE = 'maritime_ensemble.pkl'
+
+# Identify Categorical and Numerical columns (V2 Advanced Model)
+CATEGORICAL_COLS = [
+    'Ship_Type', 'Hull_Fouling', 'Main_Engine_Type', 'Propeller_Type', 
+    'Speed_Profile', 'Season', 'Wind_Direction', 'Current_Direction', 'Fuel_Type'
+]
+
+NUMERICAL_COLS = [
+    'DWT', 'GT', 'LOA', 'Beam', 'Design_Speed', 'Draft_Percentage', 
+    'Engine_Power_kW', 'SFOC_g_kWh', 'Distance_NM', 'Avg_Speed_Knots', 
+    'Wind_Beaufort', 'Wave_Height_m', 'Current_Speed_Knots', 'Weather_Routing_Efficiency'
+]
+
+# Declared vocabulary for streaming training, where categories cannot be inferred
+# from a full pass. Sorted, so the one-hot layout matches an inferred OneHotEncoder.
+CATEGORY_VOCABULARY = {
+    'Ship_Type': ['Bulker', 'Container', 'LNG', 'Ro-Ro', 'Tanker'],
+    'Hull_Fouling': ['Clean', 'Heavy', 'Moderate'],
+    'Main_Engine_Type': ['2-Stroke', '4-Stroke'],
+    'Propeller_Type': ['Controllable Pitch', 'Fixed Pitch'],
+    'Speed_Profile': ['Constant', 'Variable'],
+    'Season': ['Inter-Monsoon', 'Northeast Monsoon', 'Southwest Monsoon'],
+    'Wind_Direction': ['Beam', 'Following', 'Head', 'Quartering'],
+    'Current_Direction': ['Beam', 'Following', 'Head'],
+    'Fuel_Type': ['HFO', 'LNG', 'MGO', 'VLSFO']
+}
+
+# Streaming defaults
+DEFAULT_CHUNK_SIZE = 100_000
+BACKGROUND_RESERVOIR_SIZE = 20_000
+
+def build_background_summary(X_train, strata, n_samples=BACKGROUND_SIZE, random_state=42):
+    """
+    Summarizes the training matrix into `n_samples` weighted rows for SHAP.
+    Rows are allotted to each stratum (Ship_Type) by its share of the data,
+    clustered with k-means inside the stratum, and each centroid is snapped to
+    its nearest real training row so one-hot columns stay valid.
+    """
+    X_train = np.asarray(X_train)
+    strata = np.asarray(strata)
+    total = len(strata)
+
+    rows, weights, labels = [], [], []
+    for stratum in np.unique(strata):
+        members = X_train[strata == stratum]
+        k = int(min(len(members), max(1, round(n_samples * len(members) / total))))
+
+        kmeans = KMeans(n_clusters=k, n_init=10, random_state=random_state).fit(members)
+        for cluster in range(k):
+            cluster_rows = members[kmeans.labels_ == cluster]
+            if len(cluster_rows) == 0:
+                continue
+            nearest = np.argmin(((cluster_rows - kmeans.cluster_centers_[cluster]) ** 2).sum(axis=1))
+            rows.append(cluster_rows[nearest])
+            weights.append(len(cluster_rows) / total)
+            labels.append(str(stratum))
+
+    return {
+        'data': np.vstack(rows).astype(np.float64),
+        'weights': np.asarray(weights),
+        'strata': labels,
+        'method': 'stratified-kmeans-medoids'
+    }
+
+def build_preprocessor(categories='auto'):
+    """
+    The unfitted ColumnTransformer every training mode uses.
+    """
     numerical_transformer = StandardScaler()
-    categorical_transformer = OneHotEncoder(handle_unknown='ignore', sparse_output=False)
+    categorical_transformer = OneHotEncoder(categories=categories, handle_unknown='ignore', sparse_output=False)
     
-    preprocessor = ColumnTransformer(
+    return ColumnTransformer(
         transformers=[
-            ('num', numerical_transformer, numerical_cols),
-            ('cat', categorical_transformer, categorical_cols)
+            ('num', numerical_transformer, NUMERICAL_COLS),
+            ('cat', categorical_transformer, CATEGORICAL_COLS)
         ]
     )
+
+def prepare_training_matrix(data_path):
+    """
+    Parses the dataset and fits the preprocessor. Returns (X_processed, y, ship_types,
+    feature_columns, processed_feature_names, preprocessor), the layout dataset_cache stores.
+    """
+    df = pd.read_parquet(data_path) if str(data_path).endswith('.parquet') else pd.read_csv(data_path)
+    
+    # Separate features and target
+    X = df.drop(TARGET_COL, axis=1)
+    y = df[TARGET_COL]
+    
+    # Preprocessing Pipeline
+    preprocessor = build_preprocessor()
     
     # Fit the preprocessor
     X_processed = preprocessor.fit_transform(X)
     
+    return X_processed, y.to_numpy(), X['Ship_Type'].to_numpy(), list(X.columns), preprocessor.get_feature_names_out(), preprocessor
+
+# Anything that changes the cached matrix for the same source file belongs here
+DATASET_CACHE_CONFIG = {
+    'target': TARGET_COL,
+    'numerical': NUMERICAL_COLS,
+    'categorical': CATEGORICAL_COLS,
+    'preprocessor': 'StandardScaler+OneHotEncoder(ignore)',
+    'sklearn': sklearn.__version__
+}
+
+def load_training_matrix(data_path, cache_dir=None):
+    """
+    prepare_training_matrix, served from the memory-mapped dataset cache when `cache_dir` is set.
+    Cached matrices are float32.
+    """
+    if cache_dir is None:
+        return prepare_training_matrix(data_path)
+
+    dataset = dataset_cache.load_or_build(data_path, prepare_training_matrix, DATASET_CACHE_CONFIG, cache_dir)
+    return (dataset.X, dataset.y, dataset.strata, dataset.feature_columns,
+            dataset.processed_feature_names, dataset.preprocessor)
+
+def train_model(data_path='fuel_consumption_data.csv', output_dir='backend', cache_dir=None):
+    print("Loading data...")
+    X_processed, y, ship_types, feature_columns, feature_names, preprocessor = load_training_matrix(data_path, cache_dir)
+    
+    print(f"Numerical features ({len(NUMERICAL_COLS)}): {NUMERICAL_COLS}")
+    print(f"Categorical features ({len(CATEGORICAL_COLS)}): {CATEGORICAL_COLS}")
+    
     print(f"DEBUG: Processed Feature Shape: {X_processed.shape}")
-    feature_names = preprocessor.get_feature_names_out()
     print(f"DEBUG: Total Features: {len(feature_names)}")
     # print(f"DEBUG: Feature Names: {feature_names}")
     
     # Split data
-    X_train, X_test, y_train, y_test = train_test_split(X_processed, y, test_size=0.2, random_state=42)
+    X_train, X_test, y_train, y_test, ship_train, _ = train_test_split(
+        X_processed, y, ship_types, test_size=0.2, random_state=42
+    )
     
     print(f"Training data shape: {X_train.shape}")
     
@@ -72,13 +174,164 @@ def train_model():
     mae = mean_absolute_error(y_test, y_pred)
     print(f"Test MAE: {mae:.2f} tons")
     
-    # Save Artifacts
+    # SHAP Background (precomputed so serving starts warm and reproducible)
+    print("Building SHAP background summary...")
+    background = build_background_summary(X_train, ship_train)
+    print(f"SHAP background summary: {background['data'].shape}")
+    
+    save_artifacts(output_dir, model, preprocessor, feature_columns, background,
+                   training_metrics={'test_mae': float(mae), 'train_rows': len(X_train), 'test_rows': len(X_test)})
+
+def save_artifacts(output_dir, model, preprocessor, feature_columns, background, members=None, training_metrics=None):
     print("Saving artifacts...")
-    joblib.dump(model, 'backend/maritime_model.pkl')
-    joblib.dump(preprocessor, 'backend/preprocessor.pkl')
-    joblib.dump(list(X.columns), 'backend/feature_names.pkl')
+    os.makedirs(output_dir, exist_ok=True)
+    joblib.dump(model, os.path.join(output_dir, 'maritime_model.pkl'))
+    joblib.dump(preprocessor, os.path.join(output_dir, 'preprocessor.pkl'))
+    joblib.dump(feature_columns, os.path.join(output_dir, 'feature_names.pkl'))
+    joblib.dump(background, os.path.join(output_dir, 'shap_background.pkl'))
     
-    print("Model and preprocessor saved to backend/")
+    print(f"Model, preprocessor and SHAP background saved to {output_dir}/")
+
+    ensemble_path = os.path.join(output_dir, ENSEMBLE_FILE)
+    if members is not None and len(members) > 1:
+        joblib.dump(members, ensemble_path)
+        print(f"Ensemble saved to {ensemble_path}")
+    elif os.path.exists(ensemble_path):
+        # A stale ensemble would silently override the new single model
+        os.remove(ensemble_path)
+
+    # Same model as one versioned, memory-mappable bundle; serving prefers it when present
+    bundle_dir = os.path.join(output_dir, DEFAULT_BUNDLE_DIR)
+    try:
+        version = save_bundle(bundle_dir, members or model, preprocessor, feature_columns, background, training_metrics)
+        print(f"Model bundle {version} saved to {bundle_dir}/")
+    except ValueError as e:
+        print(f"Model bundle not written: {e}")
+
+def iter_dataset_chunks(data_path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yields DataFrames of at most `chunk_size` rows from a CSV or Parquet file.
+    """
+    if str(data_path).endswith('.parquet'):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Reading Parquet requires pyarrow: pip install pyarrow")
+        for batch in pq.ParquetFile(data_path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+        return
+
+    yield from pd.read_csv(data_path, chunksize=chunk_size)
+
+def _holdout_mask(chunk_index, n_rows, holdout_fraction, random_state):
+    # Seeded per chunk, so every pass over the file sees the same split
+    rng = np.random.default_rng([random_state, chunk_index])
+    return rng.random(n_rows) < holdout_fraction
+
+def _reservoir_update(reservoir, chunk, size, rng):
+    """
+    Bottom-k sampling: keeps the `size` rows with the smallest random keys,
+    which is a uniform sample of every row seen so far.
+    """
+    chunk = chunk.assign(_key=rng.random(len(chunk)))
+    merged = chunk if reservoir is None else pd.concat([reservoir, chunk], ignore_index=True)
+    return merged.nsmallest(size, '_key') if len(merged) > size else merged
+
+def train_model_streaming(data_path='fuel_consumption_data.csv', output_dir='backend', chunk_size=DEFAULT_CHUNK_SIZE,
+                          epochs=10, holdout_fraction=0.2, random_state=42):
+    """
+    Out-of-core training. Peak memory is bounded by `chunk_size`, not the dataset:
+    pass 1 fits the scaler with partial_fit, categories come from CATEGORY_VOCABULARY,
+    then each epoch streams the chunks through MLPRegressor.partial_fit and scores
+    MAE on a held-out stream. Writes the same artifacts as train_model.
+    """
+    rng = np.random.default_rng(random_state)
+
+    # Pass 1: scaler statistics and a uniform sample of training rows for the SHAP background
+    print("Pass 1: fitting scaler statistics...")
+    scaler = StandardScaler()
+    reservoir = None
+    first_chunk = None
+    feature_columns = None
+    train_rows = holdout_rows = 0
+    for chunk_index, chunk in enumerate(iter_dataset_chunks(data_path, chunk_size)):
+        holdout = _holdout_mask(chunk_index, len(chunk), holdout_fraction, random_state)
+        train = chunk[~holdout]
+        if feature_columns is None:
+            feature_columns = [col for col in chunk.columns if col != TARGET_COL]
+            first_chunk = train
+        scaler.partial_fit(train[NUMERICAL_COLS].to_numpy(dtype=np.float64))
+        reservoir = _reservoir_update(reservoir, train, BACKGROUND_RESERVOIR_SIZE, rng)
+        train_rows += len(train)
+        holdout_rows += int(holdout.sum())
+
+    if first_chunk is None:
+        raise ValueError(f"No rows found in {data_path}")
+    print(f"Training rows: {train_rows}, held-out rows: {holdout_rows}")
+
+    # Fixed vocabulary, so the encoder never needs to see the whole dataset
+    preprocessor = build_preprocessor(categories=[CATEGORY_VOCABULARY[col] for col in CATEGORICAL_COLS])
+    preprocessor.fit(first_chunk)
+    # Swap in the full-dataset statistics from pass 1
+    fitted_scaler = preprocessor.named_transformers_['num']
+    for attr in ('mean_', 'var_', 'scale_', 'n_samples_seen_'):
+        setattr(fitted_scaler, attr, getattr(scaler, attr))
+    del first_chunk
+
+    model = MLPRegressor(
+        hidden_layer_sizes=(64, 32, 16),
+        activation='relu',
+        solver='adam',
+        random_state=random_state
+    )
+
+    best_mae, best_model = None, None
+    for epoch in range(1, epochs + 1):
+        abs_error, scored = 0.0, 0
+        for chunk_index, chunk in enumerate(iter_dataset_chunks(data_path, chunk_size)):
+            holdout = _holdout_mask(chunk_index, len(chunk), holdout_fraction, random_state)
+            X_chunk = preprocessor.transform(chunk)
+            y_chunk = chunk[TARGET_COL].to_numpy(dtype=np.float64)
+
+            train_idx = np.flatnonzero(~holdout)
+            if len(train_idx):
+                rng.shuffle(train_idx)
+                model.partial_fit(X_chunk[train_idx], y_chunk[train_idx])
+
+            if holdout.any():
+                abs_error += np.abs(model.predict(X_chunk[holdout]) - y_chunk[holdout]).sum()
+                scored += int(holdout.sum())
+
+        mae = abs_error / scored if scored else float('nan')
+        print(f"Epoch {epoch}/{epochs}: held-out MAE {mae:.2f} tons")
+        if best_mae is None or mae < best_mae:
+            best_mae, best_model = mae, copy.deepcopy(model)
+
+    print(f"Best held-out MAE: {best_mae:.2f} tons")
+
+    print("Building SHAP background summary...")
+    background = build_background_summary(preprocessor.transform(reservoir), reservoir['Ship_Type'])
+
+    save_artifacts(output_dir, best_model, preprocessor, feature_columns, background,
+                   training_metrics={'holdout_mae': float(best_mae), 'train_rows': train_rows, 'holdout_rows': holdout_rows})
+    return best_mae
 
 if __name__ == "__main__":
-    train_model()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Train the fuel consumption model")
+    parser.add_argument("--data", default="fuel_consumption_data.csv")
+    parser.add_argument("--output-dir", default="backend")
+    parser.add_argument("--streaming", action="store_true", help="out-of-core training over chunks (CSV or Parquet)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--epochs", type=int, default=10)
+    parser.add_argument("--holdout", type=float, default=0.2, help="fraction of rows held out for MAE")
+    parser.add_argument("--cache-dir", default=None,
+                        help=f"reuse the preprocessed matrix from this dataset cache, e.g. {dataset_cache.DEFAULT_CACHE_DIR}")
+    args = parser.parse_args()
+
+    if args.streaming:
+        train_model_streaming(data_path=args.data, output_dir=args.output_dir, chunk_size=args.chunk_size,
+                              epochs=args.epochs, holdout_fraction=args.holdout)
+    else:
+        train_model(data_path=args.data, output_dir=args.output_dir, cache_dir=args.cache_dir)
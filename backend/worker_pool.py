@@ -0,0 +1,22 @@
+from concurrent.futures import ProcessPoolExecutor
+
+
+def _start_worker(initializer, initargs):
+    # One BLAS thread per process, so N workers use N cores rather than fighting over them
+    from threadpoolctl import threadpool_limits
+    threadpool_limits(1)
+    if initializer is not None:
+        initializer(*initargs)
+
+
+def process_pool(workers, initializer=None, initargs=(), mp_context=None):
+    """
+    ProcessPoolExecutor for CPU-bound work: each worker limits BLAS to one thread,
+    then runs `initializer(*initargs)` to load whatever it keeps between tasks.
+    """
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=mp_context,
+        initializer=_start_worker,
+        initargs=(initializer, initargs)
+    )
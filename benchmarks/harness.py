@@ -0,0 +1,107 @@
+import json
+import os
+import platform
+import subprocess
+import time
+
+import numpy as np
+
+
+def percentiles(samples_ms):
+    samples = np.asarray(samples_ms, dtype=float)
+    return {
+        "p50": float(np.percentile(samples, 50)),
+        "p95": float(np.percentile(samples, 95)),
+        "p99": float(np.percentile(samples, 99)),
+        "mean": float(samples.mean())
+    }
+
+
+def time_calls(fn, repeats):
+    """
+    Calls fn() `repeats` times and returns per-call latencies in milliseconds.
+    """
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000.0)
+    return samples
+
+
+class Recorder:
+    """
+    Collects named metrics. Each metric records its unit and whether
+    higher or lower is better, so runs can be compared without context.
+    """
+
+    def __init__(self):
+        self.metrics = {}
+
+    def add(self, name, value, unit, better):
+        if better not in ("higher", "lower"):
+            raise ValueError(f"better must be 'higher' or 'lower', got {better}")
+        self.metrics[name] = {"value": round(float(value), 4), "unit": unit, "better": better}
+        print(f"  {name:<48} {value:>12.3f} {unit}")
+
+    def add_latencies(self, prefix, samples_ms):
+        for stat, value in percentiles(samples_ms).items():
+            self.add(f"{prefix}.{stat}_ms", value, "ms", "lower")
+
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count()
+    }
+
+
+def save(path, metrics, config):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"environment": environment(), "config": config, "metrics": metrics}, f, indent=2, sort_keys=True)
+
+
+def compare(current, baseline, threshold, overrides=None):
+    """
+    Returns (regressions, rows). A metric regresses when it moves in the
+    wrong direction by more than its threshold (a fraction of the baseline).
+    """
+    overrides = overrides or {}
+    regressions = []
+    rows = []
+    for name, metric in sorted(current.items()):
+        base = baseline.get(name)
+        if base is None or base["value"] == 0:
+            continue
+
+        if metric["better"] == "higher":
+            change = (base["value"] - metric["value"]) / abs(base["value"])
+        else:
+            change = (metric["value"] - base["value"]) / abs(base["value"])
+
+        limit = overrides.get(name, threshold)
+        regressed = change > limit
+        rows.append((name, base["value"], metric["value"], change, regressed))
+        if regressed:
+            regressions.append(name)
+    return regressions, rows
+
+
+def parse_overrides(items):
+    overrides = {}
+    for item in items or []:
+        name, value = item.split("=")
+        overrides[name.strip()] = float(value)
+    return overrides
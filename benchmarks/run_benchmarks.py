@@ -0,0 +1,352 @@
+"""
+Performance benchmarks for VesselFuel-ML.
+
+Measures the data generator, training, ExplainerService, the /predict
+endpoint and server startup, writes the metrics to JSON and optionally fails
+on regressions against a previous run:
+
+    python benchmarks/run_benchmarks.py --output benchmarks/results/baseline.json
+    python benchmarks/run_benchmarks.py --baseline benchmarks/results/baseline.json --threshold 0.25
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND = os.path.join(ROOT, "backend")
+sys.path[:0] = [BACKEND, ROOT]
+
+import harness  # noqa: E402
+from data_generator import sample_voyage as voyage  # noqa: E402
+
+BENCHMARKS = ("generator", "training", "explainer", "api", "startup")
+
+FULL = {"generator_rows": 500_000, "loop_rows": 5_000, "training_rows": 4_000,
+        "repeats": 200, "shap_repeats": 20, "load_requests": 2_000, "concurrency": 32, "startup_workers": 4,
+        "shap_batch_rows": 200}
+QUICK = {"generator_rows": 50_000, "loop_rows": 1_000, "training_rows": 1_500,
+         "repeats": 50, "shap_repeats": 5, "load_requests": 300, "concurrency": 16, "startup_workers": 2,
+         "shap_batch_rows": 40}
+
+
+def bench_generator(rec, cfg, workdir):
+    from data_generator import generate_synthetic_data, generate_synthetic_data_loop
+
+    rows = cfg["generator_rows"]
+    best = min(harness.time_calls(lambda: generate_synthetic_data(rows, seed=0), 3))
+    rec.add("generator.vectorized.rows_per_sec", rows / (best / 1000.0), "rows/s", "higher")
+
+    rows = cfg["loop_rows"]
+    elapsed = harness.time_calls(lambda: generate_synthetic_data_loop(rows), 1)[0]
+    rec.add("generator.loop.rows_per_sec", rows / (elapsed / 1000.0), "rows/s", "higher")
+
+
+def bench_training(rec, cfg, workdir):
+    from data_generator import write_synthetic_data
+    from train_model import train_model
+
+    data_path = os.path.join(workdir, "train.csv")
+    write_synthetic_data(data_path, cfg["training_rows"], seed=0)
+
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        train_model(data_path=data_path, output_dir=workdir)
+    rec.add("training.wall_time_s", time.perf_counter() - started, "s", "lower")
+
+
+def bench_explainer(rec, cfg, workdir):
+    from explainability import ExplainerService, service_paths
+
+    paths = service_paths(workdir)
+    quiet = contextlib.redirect_stdout(io.StringIO())
+
+    # Cold: service construction plus the first request
+    with quiet:
+        started = time.perf_counter()
+        service = ExplainerService(warm=False, **paths)
+        service.explain_batch([voyage(0)])
+        cold_predict_ms = (time.perf_counter() - started) * 1000.0
+
+        started = time.perf_counter()
+        service = ExplainerService(warm=False, **paths)
+        service.explain(voyage(0))
+        cold_shap_ms = (time.perf_counter() - started) * 1000.0
+
+    rec.add("explainer.cold.predict_ms", cold_predict_ms, "ms", "lower")
+    rec.add("explainer.cold.kernel_shap_ms", cold_shap_ms, "ms", "lower")
+
+    counter = iter(range(1, 10**9))
+    rec.add_latencies("explainer.warm.predict", harness.time_calls(
+        lambda: service.explain_batch([voyage(next(counter))]), cfg["repeats"]))
+    rec.add_latencies("explainer.warm.deeplift", harness.time_calls(
+        lambda: service.explain(voyage(next(counter)), mode="deeplift"), cfg["repeats"]))
+    with quiet:
+        samples = harness.time_calls(lambda: service.explain(voyage(next(counter))), cfg["shap_repeats"])
+    rec.add_latencies("explainer.warm.kernel_shap", samples)
+    with quiet:
+        samples = harness.time_calls(lambda: service.explain(voyage(next(counter)), tier="reduced"), cfg["shap_repeats"])
+    rec.add_latencies("explainer.warm.kernel_shap_reduced", samples)
+
+    rows = [voyage(i) for i in range(1000)]
+    best = min(harness.time_calls(lambda: service.explain_batch(rows), 5))
+    rec.add("explainer.batch_1000.rows_per_sec", 1000 / (best / 1000.0), "rows/s", "higher")
+
+    # Kernel SHAP on a batch: in-process against the process pool (one worker per core)
+    rows = [voyage(10**6 + i) for i in range(cfg["shap_batch_rows"])]
+    with quiet:
+        in_process = rows[:50]
+        elapsed = harness.time_calls(lambda: service.explain_batch(in_process, explain=True), 1)[0]
+        pooled = ExplainerService(shap_workers=os.cpu_count(), **paths)
+        pooled_elapsed = harness.time_calls(lambda: pooled.explain_batch(rows, explain=True), 1)[0]
+        pooled.close()
+    rec.add("explainer.kernel_batch.rows_per_sec", len(in_process) / (elapsed / 1000.0), "rows/s", "higher")
+    rec.add("explainer.parallel_kernel_batch.rows_per_sec", len(rows) / (pooled_elapsed / 1000.0), "rows/s", "higher")
+
+
+async def load_generate(client, path, total, concurrency, offset=0):
+    """
+    Fires `total` POSTs from `concurrency` workers; returns (latencies_ms, errors, elapsed_s).
+    """
+    latencies, errors = [], 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            started = time.perf_counter()
+            response = await client.post(path, json=voyage(offset + i))
+            latencies.append((time.perf_counter() - started) * 1000.0)
+            if response.status_code != 200:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return latencies, errors, time.perf_counter() - started
+
+
+def record_load(rec, prefix, latencies, errors, elapsed):
+    rec.add_latencies(prefix, latencies)
+    rec.add(f"{prefix}.throughput_rps", len(latencies) / elapsed, "req/s", "higher")
+    rec.add(f"{prefix}.error_rate", errors / max(1, len(latencies)), "ratio", "lower")
+
+
+def bench_api(rec, cfg, workdir, url=None):
+    import httpx
+
+    if url:
+        async def remote():
+            async with httpx.AsyncClient(base_url=url, timeout=60) as client:
+                return await load_generate(client, "/predict?attribution_mode=deeplift", cfg["load_requests"], cfg["concurrency"])
+        record_load(rec, "api.remote.deeplift", *asyncio.run(remote()))
+        return
+
+    # Measure the service itself, not the cache
+    os.environ["VESSELFUEL_ARTIFACT_DIR"] = workdir
+    os.environ["VESSELFUEL_CACHE_SIZE"] = "0"
+    from fastapi.testclient import TestClient
+    with contextlib.redirect_stdout(io.StringIO()):
+        import main
+
+    with contextlib.redirect_stdout(io.StringIO()), TestClient(main.app) as client:
+        counter = iter(range(10**9))
+        samples = harness.time_calls(
+            lambda: client.post("/predict?attribution_mode=deeplift", json=voyage(next(counter))), cfg["repeats"])
+        kernel_samples = harness.time_calls(
+            lambda: client.post("/predict", json=voyage(next(counter))), cfg["shap_repeats"])
+
+    # The load generator needs the app's startup (and its batcher) on its own event loop
+    async def local():
+        async with main.app.router.lifespan_context(main.app):
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as ac:
+                return await load_generate(ac, "/predict?attribution_mode=deeplift", cfg["load_requests"], cfg["concurrency"], offset=10**6)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        load = asyncio.run(local())
+
+    rec.add_latencies("api.sequential.deeplift", samples)
+    rec.add_latencies("api.sequential.kernel_shap", kernel_samples)
+    record_load(rec, "api.concurrent.deeplift", *load)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def worker_pids(parent_pid):
+    """
+    Direct children of `parent_pid`, read from /proc (Linux only; empty elsewhere).
+    """
+    pids = []
+    for entry in os.listdir("/proc") if os.path.isdir("/proc") else []:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The command name can contain spaces; fields resume after its closing paren
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == parent_pid:
+            pids.append(int(entry))
+    return pids
+
+
+def memory_mb(pid):
+    """
+    (RSS, PSS) in MB. PSS splits shared pages between the processes mapping them,
+    so it shows what copy-on-write sharing actually saves.
+    """
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in ("Rss", "Pss"):
+                values[key] = int(rest.split()[0]) / 1024.0
+    return values["Rss"], values["Pss"]
+
+
+def measure_server(command, env, port, workers, timeout=180):
+    """
+    Starts a server and reports seconds until /health is ready, until the first successful
+    /predict with a DeepLIFT explanation and until the first KernelExplainer /predict, plus
+    mean per-worker RSS and PSS once all workers are up.
+    """
+    import httpx
+
+    started = time.perf_counter()
+    process = subprocess.Popen(command, cwd=BACKEND, env=env, stdout=subprocess.DEVNULL,
+                               stderr=subprocess.DEVNULL, start_new_session=True)
+    result = {}
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=60) as client:
+            def wait_for(method, path, **kwargs):
+                while time.perf_counter() - started < timeout:
+                    try:
+                        if client.request(method, path, **kwargs).status_code == 200:
+                            return time.perf_counter() - started
+                    except httpx.TransportError:
+                        pass
+                    time.sleep(0.02)
+                raise TimeoutError(f"{' '.join(command)} did not answer {path} within {timeout}s")
+
+            result["ready_s"] = wait_for("GET", "/health")
+            result["first_predict_s"] = wait_for("POST", "/predict?explanation=fast", json=voyage(0))
+            result["first_kernel_predict_s"] = wait_for("POST", "/predict", json=voyage(1))
+
+            while len(worker_pids(process.pid)) < workers and time.perf_counter() - started < timeout:
+                time.sleep(0.1)
+            usage = [memory_mb(pid) for pid in worker_pids(process.pid)]
+            if usage:
+                result["worker_rss_mb"] = sum(rss for rss, _ in usage) / len(usage)
+                result["worker_pss_mb"] = sum(pss for _, pss in usage) / len(usage)
+    finally:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            os.killpg(process.pid, signal.SIGKILL)
+            process.wait()
+    return result
+
+
+def bench_startup(rec, cfg, workdir):
+    """
+    Cold start of `uvicorn --workers N` (every worker imports shap and loads its own model)
+    against serve.py (model loaded once in the parent, shap deferred, workers forked).
+    """
+    workers = cfg["startup_workers"]
+    env = {**os.environ, "VESSELFUEL_ARTIFACT_DIR": workdir, "VESSELFUEL_CACHE_SIZE": "0"}
+    servers = {
+        "uvicorn": lambda port: [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port),
+                                 "--workers", str(workers), "--log-level", "warning"],
+        "prefork": lambda port: [sys.executable, "serve.py", "--port", str(port),
+                                 "--workers", str(workers), "--log-level", "warning"],
+    }
+    for name, command in servers.items():
+        port = free_port()
+        result = measure_server(command(port), env, port, workers)
+        rec.add(f"startup.{name}.ready_s", result["ready_s"], "s", "lower")
+        rec.add(f"startup.{name}.first_predict_s", result["first_predict_s"], "s", "lower")
+        rec.add(f"startup.{name}.first_kernel_predict_s", result["first_kernel_predict_s"], "s", "lower")
+        if "worker_rss_mb" in result:
+            rec.add(f"startup.{name}.worker_rss_mb", result["worker_rss_mb"], "MB", "lower")
+            rec.add(f"startup.{name}.worker_pss_mb", result["worker_pss_mb"], "MB", "lower")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="VesselFuel-ML performance benchmarks")
+    parser.add_argument("--only", default=",".join(BENCHMARKS), help=f"comma-separated subset of {BENCHMARKS}")
+    parser.add_argument("--quick", action="store_true", help="smaller sizes for a fast smoke run")
+    parser.add_argument("--output", default=None, help="JSON results path (default benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--baseline", default=None, help="previous results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed regression as a fraction of baseline")
+    parser.add_argument("--metric-threshold", action="append", default=[], metavar="NAME=FRACTION",
+                        help="per-metric threshold override, repeatable")
+    parser.add_argument("--url", default=None, help="load-test a running server instead of the in-process app")
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore")
+    selected = [name.strip() for name in args.only.split(",") if name.strip()]
+    unknown = set(selected) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmarks: {sorted(unknown)}")
+
+    cfg = QUICK if args.quick else FULL
+    rec = harness.Recorder()
+
+    with tempfile.TemporaryDirectory(prefix="vesselfuel-bench-") as workdir:
+        # The explainer and API benchmarks need artifacts; train a fresh set in the temp dir
+        needs_artifacts = "explainer" in selected or "startup" in selected or ("api" in selected and not args.url)
+        if needs_artifacts and "training" not in selected:
+            selected.insert(0, "training")
+
+        for name in BENCHMARKS:
+            if name not in selected:
+                continue
+            print(f"[{name}]")
+            if name == "generator":
+                bench_generator(rec, cfg, workdir)
+            elif name == "training":
+                bench_training(rec, cfg, workdir)
+            elif name == "explainer":
+                bench_explainer(rec, cfg, workdir)
+            elif name == "api":
+                bench_api(rec, cfg, workdir, url=args.url)
+            elif name == "startup":
+                bench_startup(rec, cfg, workdir)
+
+    output = args.output or os.path.join(ROOT, "benchmarks", "results", time.strftime("%Y%m%d-%H%M%S") + ".json")
+    harness.save(output, rec.metrics, {"quick": args.quick, "sizes": cfg, "benchmarks": selected})
+    print(f"Results saved to {output}")
+
+    if args.baseline:
+        import json
+        with open(args.baseline) as f:
+            baseline = json.load(f)["metrics"]
+        regressions, rows = harness.compare(rec.metrics, baseline, args.threshold, harness.parse_overrides(args.metric_threshold))
+
+        print(f"\nComparison against {args.baseline} (threshold {args.threshold:.0%})")
+        for name, before, after, change, regressed in rows:
+            flag = "REGRESSION" if regressed else ""
+            print(f"  {name:<48} {before:>12.3f} -> {after:>12.3f}  {change:+7.1%} {flag}")
+
+        if regressions:
+            print(f"\n{len(regressions)} metric(s) regressed: {', '.join(regressions)}")
+            sys.exit(1)
+        print("\nNo regressions.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 import React, { useEffect, useState } from 'react';
 import { useLocation, useNavigate } from 'react-router-dom';
-import axios from 'axios';
+import { streamPrediction } from './predictionStream';
 
 const QUOTES = [
   "Consulting Poseidon for wave data...",
@@ -28,8 +28,7 @@ const Loading = () => {
       setProgress(prev => Math.min(prev + 2, 100));
     }, 50);
 
-    // API Call (in background)
-    // We delay the actual navigation to let the user enjoy the funny quotes for at least 3-4s
+    // API Call (in background); the quotes run until the first streamed event arrives
     const performPrediction = async () => {
         try {
             const defaults = {
@@ -49,20 +48,21 @@ const Loading = () => {
             // We use state.formData which came from Review
             // Force 127.0.0.1 to avoid IPv6 localhost issues on Mac
             console.log("Sending Prediction Request:", formData);
-            const response = await axios.post('http://127.0.0.1:8000/predict', formData);
+            // Streamed: the prediction arrives first, the SHAP explanation follows on the Result page
+            const { id, prediction } = streamPrediction(formData);
+            const result = await prediction;
             
-            console.log("Prediction Success:", response.data);
+            console.log("Prediction Success:", result);
 
-            // Wait until progress is complete visually
-            setTimeout(() => {
-                navigate('/result', { state: { result: response.data, input: formData } });
-            }, 3000); 
+            // Show the prediction as soon as it is streamed; the explanation keeps loading there
+            setProgress(100);
+            navigate('/result', { state: { result, input: formData, explanationId: id } });
 
         } catch (err) {
             console.error("Prediction Error Details:", err);
-            if (err.response) {
-                console.error("Server Response:", err.response.data);
-                alert(`Server Error: ${JSON.stringify(err.response.data)}`);
+            if (err.detail) {
+                console.error("Server Response:", err.detail);
+                alert(`Server Error: ${JSON.stringify(err.detail)}`);
             } else {
                 alert(`Connection Failed: ${err.message}`);
             }
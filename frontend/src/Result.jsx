@@ -6,6 +6,7 @@ import {
   BarChart, Bar, XAxis, YAxis, Tooltip, ResponsiveContainer, Cell, ReferenceLine 
 } from 'recharts';
 import { Zap, RefreshCw, Wind, Anchor, Gauge, Thermometer, Droplets } from 'lucide-react';
+import { takeExplanation } from './predictionStream';
 
 const Result = () => {
   const { state } = useLocation();
@@ -14,11 +15,26 @@ const Result = () => {
   const input = state?.input;
 
   const [visible, setVisible] = useState(false);
+  // Streamed results arrive without contributions; they are filled in when the explanation lands
+  const [details, setDetails] = useState(result?.contributions ? result : null);
+  const [explanationError, setExplanationError] = useState(null);
 
   useEffect(() => {
     setVisible(true);
   }, []);
 
+  useEffect(() => {
+    if (details || state?.explanationId === undefined) return;
+    const pending = takeExplanation(state.explanationId);
+    if (!pending) {
+      setExplanationError('Explanation is no longer available.');
+      return;
+    }
+    pending
+      .then((explanation) => setDetails(explanation))
+      .catch((err) => setExplanationError(err.message));
+  }, [state?.explanationId]);
+
   if (!result || !input) {
     return (
       <div style={{padding: '5rem', textAlign: 'center', color: '#fff'}}>
@@ -41,7 +57,7 @@ const Result = () => {
   ];
 
   // 2. Waterfall/Bar Data
-  const contributionData = Object.entries(result.contributions)
+  const contributionData = Object.entries(details?.contributions || {})
     .sort(([,a], [,b]) => Math.abs(b) - Math.abs(a)) // Sort by absolute impact
     .slice(0, 7) // Top 7 factors
     .map(([key, value]) => ({
@@ -120,7 +136,10 @@ const Result = () => {
              
              <div style={{fontSize: '1.1rem', lineHeight: 1.8, color: '#e2e8f0', flex: 1}}>
                 {/* Markdown Parser */}
-                {result.text_explanation.replace(/- /g, '').split('\n').map((line, idx) => {
+                {!details?.text_explanation && (
+                    <p style={{color: '#64748b'}}>{explanationError || (details ? 'No explanation requested.' : 'Computing factor analysis...')}</p>
+                )}
+                {(details?.text_explanation || '').replace(/- /g, '').split('\n').map((line, idx) => {
                     if (!line) return null;
                     // Split bold
                     const parts = line.split('**');
@@ -0,0 +1,80 @@
+// Two-phase client for POST /predict/stream (NDJSON).
+// The prediction resolves as soon as the model has scored the voyage; the explanation
+// keeps streaming in the background and can be picked up later by id (e.g. on the Result page).
+// Router state must stay serializable, so pending explanations live here rather than in it.
+
+const API_URL = 'http://127.0.0.1:8000';
+
+const pendingExplanations = new Map();
+let nextId = 0;
+
+async function* readEvents(response) {
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let newline;
+    while ((newline = buffer.indexOf('\n')) >= 0) {
+      const line = buffer.slice(0, newline).trim();
+      buffer = buffer.slice(newline + 1);
+      if (line) yield JSON.parse(line);
+    }
+  }
+  if (buffer.trim()) yield JSON.parse(buffer);
+}
+
+export function streamPrediction(formData) {
+  const id = nextId++;
+  let resolvePrediction, rejectPrediction, resolveExplanation, rejectExplanation;
+  const prediction = new Promise((resolve, reject) => { resolvePrediction = resolve; rejectPrediction = reject; });
+  const explanation = new Promise((resolve, reject) => { resolveExplanation = resolve; rejectExplanation = reject; });
+  // Nobody may be waiting for the explanation yet; don't report it as unhandled
+  explanation.catch(() => {});
+  pendingExplanations.set(id, explanation);
+
+  const run = async () => {
+    const response = await fetch(`${API_URL}/predict/stream`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify(formData),
+    });
+    if (!response.ok) {
+      const error = new Error(`Server Error: ${response.status}`);
+      error.detail = await response.json().catch(() => null);
+      throw error;
+    }
+
+    for await (const event of readEvents(response)) {
+      if (event.event === 'prediction') {
+        resolvePrediction(event);
+      } else if (event.event === 'explanation') {
+        resolveExplanation(event);
+        return;
+      } else if (event.event === 'error') {
+        const error = new Error(event.detail);
+        error.detail = event;
+        throw error;
+      }
+    }
+    throw new Error('Stream ended before the explanation arrived');
+  };
+
+  run().catch((error) => {
+    // Rejecting an already resolved promise is a no-op
+    rejectPrediction(error);
+    rejectExplanation(error);
+  });
+
+  return { id, prediction, explanation };
+}
+
+export function takeExplanation(id) {
+  const explanation = pendingExplanations.get(id);
+  pendingExplanations.delete(id);
+  return explanation;
+}